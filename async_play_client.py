@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Async Google Play Store client.
+
+Drop-in alternative to the google_play_scraper transport used by review_scraper:
+exposes the same fetch_reviews / search_apps interface, but runs on one event
+loop with a pooled keep-alive connection (HTTP/2 when 'h2' is installed) and
+a bounded number of in-flight requests.
+
+Payload formats and response parsing are reused from google_play_scraper, so
+results have exactly the same shape as google_play_scraper.reviews/search.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from urllib.parse import quote
+
+from google_play_scraper import Sort
+from google_play_scraper.constants.element import ElementSpecs
+from google_play_scraper.constants.regex import Regex
+from google_play_scraper.constants.request import Formats, PLAY_STORE_BASE_URL
+
+from play_replay_server import save_recording
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# ==========================================
+# CONFIGURATION (DEFAULTS)
+# ==========================================
+# Point at a local replay server (play_replay_server.py) to run offline
+BASE_URL = os.getenv("PLAY_STORE_BASE_URL", PLAY_STORE_BASE_URL)
+# Save every response here so it can be replayed later
+RECORD_DIR = os.getenv("PLAY_RECORD_DIR") or None
+
+MAX_CONCURRENCY = 8          # Max in-flight requests per client
+MAX_CONNECTIONS = 8          # Pooled keep-alive connections
+REQUEST_TIMEOUT = 30.0       # Seconds
+MAX_RETRIES = 3
+RATE_LIMIT_DELAY = 5         # Seconds, multiplied by the number of rate-limit hits
+MAX_COUNT_EACH_FETCH = 4500  # Same page limit as google_play_scraper
+
+REVIEWS_PATH = "/_/PlayStoreUi/data/batchexecute?hl={lang}&gl={country}"
+SEARCH_PATH = "/store/search?q={query}&c=apps&hl={lang}&gl={country}"
+SEARCH_FALLBACK_PATH = "/store/search?q={query}&c=apps&hl={lang}"
+RATE_LIMIT_MARKER = "com.google.play.gateway.proto.PlayGatewayError"
+
+class PlayStoreHTTPError(Exception):
+    def __init__(self, status_code, path):
+        super().__init__(f"Status code {status_code} returned for {path}")
+        self.status_code = status_code
+
+class AsyncPlayClient:
+    """
+    Pooled, concurrency-bounded Play Store client.
+
+    Use as an async context manager so the connection pool is closed:
+
+        async with AsyncPlayClient() as client:
+            reviews = await client.fetch_reviews(app_id, 500, 'US', 'en')
+    """
+
+    def __init__(self, base_url=None, max_concurrency=MAX_CONCURRENCY, max_connections=MAX_CONNECTIONS,
+                 http2=None, record_dir=None, timeout=REQUEST_TIMEOUT):
+        if httpx is None:
+            raise ImportError("❌ The async client requires httpx. Install it with: pip install 'httpx[http2]'")
+
+        self.base_url = (base_url or BASE_URL).rstrip("/")
+        self.record_dir = record_dir if record_dir is not None else RECORD_DIR
+        # HTTP/2 is only negotiated over TLS; plain-http replay servers speak HTTP/1.1
+        if http2 is None:
+            http2 = HTTP2_AVAILABLE and self.base_url.startswith("https://")
+        self.http2 = http2
+        self.requests_sent = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=http2,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            headers={"User-Agent": "Mozilla/5.0"},
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def _request(self, method, path, body=None):
+        """
+        Sends one request through the pool, retrying transport errors and
+        Play Store rate-limit responses like google_play_scraper does.
+        """
+        headers = {"content-type": "application/x-www-form-urlencoded"} if body is not None else None
+        last_exception = None
+        rate_exceeded_count = 0
+
+        for _ in range(MAX_RETRIES):
+            try:
+                async with self._semaphore:
+                    self.requests_sent += 1
+                    response = await self._client.request(method, path, content=body, headers=headers)
+            except httpx.TransportError as e:
+                last_exception = e
+                continue
+
+            if response.status_code != 200:
+                raise PlayStoreHTTPError(response.status_code, path)
+
+            text = response.text
+            if RATE_LIMIT_MARKER in text:
+                rate_exceeded_count += 1
+                last_exception = Exception(RATE_LIMIT_MARKER)
+                await asyncio.sleep(RATE_LIMIT_DELAY * rate_exceeded_count)
+                continue
+
+            if self.record_dir:
+                save_recording(self.record_dir, method, path, body, text)
+            return text
+
+        raise last_exception
+
+    async def _fetch_review_page(self, path, app_id, count, token):
+        body = Formats.Reviews.build_body(app_id, Sort.NEWEST.value, count, "null", "null", token)
+        dom = await self._request("POST", path, body)
+
+        match = json.loads(Regex.REVIEWS.findall(dom)[0])
+        results = json.loads(match[0][2])
+        try:
+            token = results[-2][-1]
+        except Exception:
+            token = None
+
+        if len(results) == 0 or len(results[0]) == 0:
+            return [], token
+        return results[0], token
+
+    async def reviews(self, app_id, count, country, lang):
+        """
+        Async equivalent of google_play_scraper.reviews(sort=Sort.NEWEST).
+        Pages of one app/country/language are sequential (each needs the previous
+        page's token); separate combinations run concurrently. Like the library,
+        a failing later page ends pagination and the pages already fetched are
+        returned; only a failing first page raises.
+        """
+        path = REVIEWS_PATH.format(lang=lang, country=country)
+        result = []
+        token = None
+
+        while len(result) < count:
+            fetch_count = min(count - len(result), MAX_COUNT_EACH_FETCH)
+            try:
+                review_items, token = await self._fetch_review_page(path, app_id, fetch_count, token)
+            except Exception as e:
+                if not result:
+                    raise
+                print(f"   ⚠️ {country} ({lang}): pagination failed after {len(result)} reviews: {e}")
+                break
+
+            for review in review_items:
+                result.append({k: spec.extract_content(review) for k, spec in ElementSpecs.Review.items()})
+
+            if token is None or isinstance(token, list) or not review_items:
+                break
+
+        return result
+
+    async def fetch_reviews(self, app_id, count, country, lang):
+        """
+        Fetches reviews for a single country and language combination.
+        Returns list of review dictionaries with country and language info added.
+        """
+        if not app_id:
+            print("❌ Error: Invalid App ID (None). Cannot fetch reviews.")
+            return []
+
+        try:
+            result = await self.reviews(app_id, count, country.lower(), lang)
+        except Exception as e:
+            print(f"   Fetching from {country} ({lang})... ❌ Failed: {e}")
+            return []
+
+        for review in result:
+            review['country'] = country.upper()
+            review['language'] = lang.upper()
+
+        print(f"   Fetching from {country} ({lang})... ✅ {len(result)} reviews")
+        return result
+
+    async def fetch_reviews_multiple(self, app_id, count, countries, languages):
+        """
+        Fetches all country/language combinations concurrently over the shared pool.
+        Results are returned in the same order as the sequential scraper.
+        """
+        tasks = [self.fetch_reviews(app_id, count, country, lang) for country in countries for lang in languages]
+        all_reviews = []
+        for combination_reviews in await asyncio.gather(*tasks):
+            all_reviews.extend(combination_reviews)
+        return all_reviews
+
+    async def search(self, query, n_hits=30, lang="en", country="us"):
+        """
+        Async equivalent of google_play_scraper.search.
+        """
+        if n_hits <= 0:
+            return []
+
+        query = quote(query)
+        try:
+            dom = await self._request("GET", SEARCH_PATH.format(query=query, lang=lang, country=country))
+        except PlayStoreHTTPError as e:
+            if e.status_code != 404:
+                raise
+            dom = await self._request("GET", SEARCH_FALLBACK_PATH.format(query=query, lang=lang))
+
+        return parse_search_results(dom, n_hits)
+
+    async def search_apps(self, query, country, lang, n_hits=10):
+        """
+        Same behaviour as review_scraper.search_apps: drops results without an
+        appId and retries once with special characters removed.
+        """
+        try:
+            results = await self.search(query, n_hits=n_hits, lang=lang, country=country)
+            valid_results = [r for r in results if r.get('appId')]
+
+            if not valid_results and len(query) > 3:
+                clean_query = ''.join(c for c in query if c.isalnum() or c.isspace())
+                if clean_query != query:
+                    print(f"   Trying alternative search: '{clean_query}'...")
+                    try:
+                        results = await self.search(clean_query, n_hits=n_hits, lang=lang, country=country)
+                        valid_results = [r for r in results if r.get('appId')]
+                    except Exception:
+                        pass
+
+            return valid_results
+        except Exception as e:
+            print(f"   ⚠️ Search error: {e}")
+            return []
+
+def parse_search_results(dom, n_hits):
+    """
+    Extracts search results from a search page (same logic as google_play_scraper.search).
+    """
+    dataset = {}
+    for match in Regex.SCRIPT.findall(dom):
+        key_match = Regex.KEY.findall(match)
+        value_match = Regex.VALUE.findall(match)
+        if key_match and value_match:
+            dataset[key_match[0]] = json.loads(value_match[0])
+
+    try:
+        top_result = dataset["ds:4"][0][1][0][23][16]
+    except (KeyError, IndexError, TypeError):
+        top_result = None
+
+    apps = None
+    # Different index for different countries and languages
+    for section in dataset.get("ds:4", [[None, []]])[0][1]:
+        try:
+            apps = section[22][0]
+        except Exception:
+            pass
+    if apps is None:
+        return []
+
+    n_apps = min(len(apps), n_hits)
+    results = []
+    if top_result:
+        results.append({k: spec.extract_content(top_result) for k, spec in ElementSpecs.SearchResultOnTop.items()})
+
+    for app in apps[:n_apps - len(results)]:
+        results.append({k: spec.extract_content(app) for k, spec in ElementSpecs.SearchResult.items()})
+    return results
+
+# ==========================================
+# SYNC WRAPPERS (same signatures as review_scraper)
+# ==========================================
+async def _with_client(method_name, *args):
+    async with AsyncPlayClient() as client:
+        return await getattr(client, method_name)(*args)
+
+def fetch_reviews(app_id, count, country, lang):
+    return asyncio.run(_with_client("fetch_reviews", app_id, count, country, lang))
+
+def fetch_reviews_multiple_countries_languages(app_id, count, countries, languages):
+    return asyncio.run(_with_client("fetch_reviews_multiple", app_id, count, countries, languages))
+
+def search_apps(query, country, lang, n_hits=10):
+    return asyncio.run(_with_client("search_apps", query, country, lang, n_hits))
+
+# ==========================================
+# THROUGHPUT CHECK
+# ==========================================
+async def _benchmark(app_id, count, countries, languages, base_url, concurrency, record_dir):
+    async with AsyncPlayClient(base_url=base_url, max_concurrency=concurrency, record_dir=record_dir) as client:
+        start = time.perf_counter()
+        all_reviews = await client.fetch_reviews_multiple(app_id, count, countries, languages)
+        elapsed = time.perf_counter() - start
+        requests_sent = client.requests_sent
+        http2 = client.http2
+
+    print("-" * 30)
+    print(f"Reviews: {len(all_reviews)} | Requests: {requests_sent} | HTTP/2: {'yes' if http2 else 'no'}")
+    print(f"Elapsed: {elapsed:.2f}s ({len(all_reviews) / elapsed if elapsed else 0:.0f} reviews/s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch reviews with the async client and report throughput.")
+    parser.add_argument("app_id")
+    parser.add_argument("--countries", default="us", help="Comma-separated country codes")
+    parser.add_argument("--languages", default="en", help="Comma-separated language codes")
+    parser.add_argument("--count", type=int, default=200, help="Reviews per combination")
+    parser.add_argument("--base-url", default=None, help="e.g. http://127.0.0.1:8765 for the replay server")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--record-dir", default=None, help="Record responses for offline replay")
+    args = parser.parse_args()
+
+    asyncio.run(_benchmark(
+        args.app_id,
+        args.count,
+        [c.strip().upper() for c in args.countries.split(",") if c.strip()],
+        [l.strip().lower() for l in args.languages.split(",") if l.strip()],
+        args.base_url,
+        args.concurrency,
+        args.record_dir,
+    ))
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Online clustering of bug reports into tracked issues.
+
+Every newly classified 'Bug Report' is turned into a hashed TF-IDF vector and
+assigned to the nearest existing issue centroid (found through a random
+hyperplane LSH index), or opens a new issue. Per-issue counts, first/last seen
+dates and affected versions are kept up to date, and the index is persisted
+between runs, so recurring problems are tracked over time instead of being
+rediscovered from a sample on every roadmap run.
+
+Usage:
+    python issue_tracker.py outputs/com.spotify.music_reviews_analyzed_ai.csv
+    python issue_tracker.py --show com.spotify.music
+"""
+import argparse
+import datetime
+import json
+import os
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+import review_rollups  # shared app-name convention
+
+DEFAULT_INDEX_DIR = os.path.join("outputs", "issue_index")
+
+# Vectorizer configuration
+HASH_DIM = 2 ** 12           # Hashed feature space (4096 floats per issue centroid)
+TOKEN_PATTERN = re.compile(r"[^\W\d_]{2,}")
+STOPWORDS = {
+    'the', 'and', 'to', 'it', 'is', 'of', 'in', 'my', 'this', 'that', 'for', 'on', 'me', 'app',
+    'but', 'with', 'not', 'be', 'so', 'have', 'was', 'are', 'can', 'you', 'when', 'just', 'all',
+    'at', 'an', 'as', 'or', 'if', 'its', 'do', 'now', 'after', 'even', 'get', 'please', 'very',
+}
+
+# Assignment configuration
+SIMILARITY_THRESHOLD = 0.30  # Minimum cosine similarity to join an existing issue
+LSH_TABLES = 16              # More tables: better recall, slightly slower updates
+LSH_BITS = 6                 # Bits per table: more bits, smaller candidate sets
+EXACT_SEARCH_LIMIT = 2000    # Below this many issues a full scan is still ~1 ms, so skip LSH
+LSH_SEED = 13                # Fixed so hyperplanes match the persisted index
+MAX_EXAMPLES = 3             # Review texts kept per issue for the roadmap prompt
+
+# Ranking: each report is weighted 2^(days since RECENCY_EPOCH / half-life), so a
+# report loses half its weight relative to new ones every RECENCY_HALF_LIFE_DAYS.
+# Stored sums are comparable across issues without rescaling as time passes.
+RECENCY_HALF_LIFE_DAYS = 30
+RECENCY_EPOCH = datetime.date(2020, 1, 1)
+
+def recency_weight(date=None):
+    """
+    Ranking weight of one report dated `date` ('YYYY-MM-DD'; undated reports count as today).
+    """
+    day = datetime.date.fromisoformat(date) if date else datetime.date.today()
+    return 2.0 ** ((day - RECENCY_EPOCH).days / RECENCY_HALF_LIFE_DAYS)
+
+def tokenize(text):
+    """
+    Lowercased word unigrams and bigrams without stopwords.
+    """
+    words = [w for w in TOKEN_PATTERN.findall(str(text).lower()) if w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+def _bucket(token):
+    # crc32 rather than hash(): must be stable across processes and runs
+    return zlib.crc32(token.encode("utf-8")) % HASH_DIM
+
+class IssueTracker:
+    """
+    Persistent issue index for one app.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.doc_freq = np.zeros(HASH_DIM, dtype=np.float32)
+        self.docs = 0
+        # Rows beyond len(self.issues) are spare capacity
+        self.sums = np.zeros((0, HASH_DIM), dtype=np.float32)        # Sum of member vectors per issue
+        self.centroids = np.zeros((0, HASH_DIM), dtype=np.float32)   # Normalized sums
+        self.issues = []        # Per-issue metadata dicts
+        self.seen = set()       # Review ids already assigned
+        self._planes = np.random.default_rng(LSH_SEED).standard_normal(
+            (LSH_TABLES * LSH_BITS, HASH_DIM)).astype(np.float32)
+        self._weights = (1 << np.arange(LSH_BITS)).astype(np.int64)
+        self._tables = [dict() for _ in range(LSH_TABLES)]
+        self._signatures = []   # Per-issue LSH signatures currently in the tables
+
+    # ---------- Vectorizing ----------
+    def vectorize(self, text, update_idf=True):
+        """
+        Hashed TF-IDF vector (L2-normalized) for one review. Document frequencies
+        are updated online, so IDF weights sharpen as more reviews arrive.
+        """
+        counts = np.zeros(HASH_DIM, dtype=np.float32)
+        buckets = [_bucket(t) for t in tokenize(text)]
+        if buckets:
+            np.add.at(counts, buckets, 1.0)
+
+        if update_idf:
+            self.docs += 1
+            self.doc_freq += counts > 0
+
+        idf = np.log((1.0 + self.docs) / (1.0 + self.doc_freq)) + 1.0
+        vector = np.log1p(counts) * idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    # ---------- LSH index ----------
+    def _signature(self, vector):
+        bits = (self._planes @ vector > 0).reshape(LSH_TABLES, LSH_BITS)
+        return tuple(int(x) for x in bits.astype(np.int64) @ self._weights)
+
+    def _index_issue(self, issue_id):
+        signature = self._signature(self.centroids[issue_id])
+        if issue_id < len(self._signatures):
+            old = self._signatures[issue_id]
+            if old == signature:
+                return
+            for table, key in zip(self._tables, old):
+                table[key].discard(issue_id)
+            self._signatures[issue_id] = signature
+        else:
+            self._signatures.append(signature)
+        for table, key in zip(self._tables, signature):
+            table.setdefault(key, set()).add(issue_id)
+
+    def nearest(self, vector):
+        """
+        Nearest issue by cosine similarity: exact scan for small indexes,
+        otherwise exact cosine over the LSH candidates only.
+        Returns (issue_id, similarity) or (None, 0.0).
+        """
+        n = len(self.issues)
+        if n == 0:
+            return None, 0.0
+        if n <= EXACT_SEARCH_LIMIT:
+            sims = self.centroids[:n] @ vector
+            best = int(np.argmax(sims))
+            return best, float(sims[best])
+
+        candidates = set()
+        for table, key in zip(self._tables, self._signature(vector)):
+            candidates |= table.get(key, set())
+        if not candidates:
+            return None, 0.0
+        ids = np.fromiter(candidates, dtype=np.int64)
+        sims = self.centroids[ids] @ vector
+        best = int(np.argmax(sims))
+        return int(ids[best]), float(sims[best])
+
+    def _reserve(self, rows):
+        """
+        Grows the centroid matrices geometrically so opening an issue is amortized O(1).
+        """
+        if rows <= len(self.sums):
+            return
+        capacity = max(rows, 2 * len(self.sums), 64)
+        for name in ('sums', 'centroids'):
+            grown = np.zeros((capacity, HASH_DIM), dtype=np.float32)
+            old = getattr(self, name)
+            grown[:len(old)] = old
+            setattr(self, name, grown)
+
+    # ---------- Assignment ----------
+    def add(self, review_id, text, date=None, version=None, priority=None):
+        """
+        Assigns one bug report to an issue (or opens a new one).
+        Returns the issue id, or None if the review was already assigned or empty.
+        """
+        if review_id is not None and review_id in self.seen:
+            return None
+        vector = self.vectorize(text)
+        if not vector.any():
+            return None
+        if review_id is not None:
+            self.seen.add(review_id)
+
+        date = None if date is None else str(date)[:10]
+        try:
+            weight = recency_weight(date)
+        except ValueError:
+            weight = recency_weight()
+        issue_id, similarity = self.nearest(vector)
+
+        if issue_id is None or similarity < SIMILARITY_THRESHOLD:
+            issue_id = len(self.issues)
+            self._reserve(issue_id + 1)
+            self.sums[issue_id] = vector
+            self.centroids[issue_id] = vector
+            self.issues.append({
+                'id': issue_id,
+                'count': 0,
+                'first_seen': date,
+                'last_seen': date,
+                'versions': [],
+                'examples': [],
+                'priorities': {},   # priority -> report count
+                'weight': 0.0,      # Recency-weighted report count (see recency_weight)
+                'weights': {},      # priority -> recency-weighted report count
+            })
+        else:
+            self.sums[issue_id] += vector
+            self.centroids[issue_id] = self.sums[issue_id] / np.linalg.norm(self.sums[issue_id])
+
+        self._index_issue(issue_id)
+
+        issue = self.issues[issue_id]
+        issue['count'] += 1
+        issue['weight'] += weight
+        if priority:
+            issue['priorities'][priority] = issue['priorities'].get(priority, 0) + 1
+            issue['weights'][priority] = issue['weights'].get(priority, 0.0) + weight
+        if date:
+            if not issue['first_seen'] or date < issue['first_seen']:
+                issue['first_seen'] = date
+            if not issue['last_seen'] or date > issue['last_seen']:
+                issue['last_seen'] = date
+        if version is not None and str(version) not in issue['versions']:
+            issue['versions'].append(str(version))
+        example = str(text)[:300]
+        if len(issue['examples']) < MAX_EXAMPLES and example not in issue['examples']:
+            issue['examples'].append(example)
+        return issue_id
+
+    def add_frame(self, df):
+        """
+        Assigns every 'Bug Report' row of an analyzed frame (with its 'priority',
+        if present). Returns the number assigned.
+        """
+        if 'category' not in df.columns:
+            return 0
+        bugs = df[df['category'] == 'Bug Report']
+        assigned = 0
+        columns = [bugs[c] if c in bugs.columns else [None] * len(bugs)
+                   for c in ('reviewId', 'review_text', 'date', 'version', 'priority')]
+        for review_id, text, date, version, priority in zip(*columns):
+            review_id = None if pd.isna(review_id) else str(review_id)
+            version = None if pd.isna(version) else version
+            priority = None if pd.isna(priority) else str(priority)
+            if self.add(review_id, text, date, version, priority) is not None:
+                assigned += 1
+        return assigned
+
+    def top_issues(self, n=20, priority=None):
+        """
+        Issues ordered by recency-weighted report count, so a burst of current
+        reports outranks a large but old issue. With `priority`, only issues with
+        reports of that priority are returned, ranked by those reports alone.
+        """
+        if priority is None:
+            candidates, weight = self.issues, lambda i: i['weight']
+        else:
+            candidates = [i for i in self.issues if i['priorities'].get(priority)]
+            weight = lambda i: i['weights'][priority]
+        return sorted(candidates, key=lambda i: (weight(i), i['last_seen'] or ""), reverse=True)[:n]
+
+    # ---------- Persistence ----------
+    def save(self, index_dir=DEFAULT_INDEX_DIR):
+        os.makedirs(index_dir, exist_ok=True)
+        base = os.path.join(index_dir, self.app)
+        np.savez_compressed(base + ".npz", doc_freq=self.doc_freq, sums=self.sums[:len(self.issues)])
+        with open(base + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump({'docs': self.docs, 'issues': self.issues, 'seen': sorted(self.seen)}, f)
+        os.replace(base + ".json.tmp", base + ".json")
+
+    @classmethod
+    def load(cls, app, index_dir=DEFAULT_INDEX_DIR):
+        """
+        Loads the issue index for an app (or starts an empty one).
+        """
+        tracker = cls(app)
+        base = os.path.join(index_dir, app)
+        if not (os.path.exists(base + ".npz") and os.path.exists(base + ".json")):
+            return tracker
+
+        arrays = np.load(base + ".npz")
+        with open(base + ".json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        tracker.doc_freq = arrays['doc_freq'].astype(np.float32)
+        tracker.sums = arrays['sums'].astype(np.float32)
+        norms = np.linalg.norm(tracker.sums, axis=1, keepdims=True)
+        tracker.centroids = tracker.sums / np.where(norms == 0, 1, norms)
+        tracker.docs = meta['docs']
+        tracker.issues = meta['issues']
+        for issue in tracker.issues:
+            # Indexes saved before priorities were tracked: approximate from the last report
+            issue.setdefault('priorities', {})
+            issue.setdefault('weights', {})
+            issue.setdefault('weight', issue['count'] * recency_weight(issue['last_seen']))
+        tracker.seen = set(meta['seen'])
+        for issue_id in range(len(tracker.issues)):
+            tracker._index_issue(issue_id)
+        return tracker
+
+def format_issue(issue):
+    versions = issue['versions']
+    if len(versions) > 3:
+        versions = versions[:2] + ["…", versions[-1]]
+    seen = f"{issue['first_seen']} → {issue['last_seen']}" if issue['first_seen'] else "dates unknown"
+    priorities = ", ".join(f"{issue['priorities'][p]} {p}" for p in ('High', 'Medium', 'Low')
+                           if issue['priorities'].get(p))
+    reports = f"{issue['count']} reports" + (f" ({priorities})" if priorities else "")
+    return (f"#{issue['id']} ({reports}, {seen}, versions: {', '.join(versions) or 'unknown'}): "
+            f"{issue['examples'][0] if issue['examples'] else ''}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cluster bug reports into tracked issues.")
+    parser.add_argument("files", nargs="*", help="_analyzed_ai.csv files to add")
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR)
+    parser.add_argument("--show", default=None, metavar="APP", help="List the top issues of an app")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--priority", default=None, help="Only issues with reports of this priority, e.g. High")
+    args = parser.parse_args()
+
+    for file_path in args.files:
+        app = review_rollups.app_name_from_path(file_path)
+        tracker = IssueTracker.load(app, args.index_dir)
+        assigned = tracker.add_frame(pd.read_csv(file_path, dtype={'version': str}))
+        tracker.save(args.index_dir)
+        print(f"✅ {file_path}: {assigned} bug reports assigned, {len(tracker.issues)} issues tracked for {app}")
+
+    if args.show:
+        tracker = IssueTracker.load(args.show, args.index_dir)
+        if not tracker.issues:
+            print(f"⚠️ No tracked issues for '{args.show}'.")
+        for issue in tracker.top_issues(args.top, args.priority):
+            print(format_issue(issue))
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Google Play Store.
+
+Replays pages recorded by async_play_client (record_dir=...) so that the
+async review/search client can be exercised and benchmarked offline.
+
+Usage:
+    python play_replay_server.py --dir recordings --port 8765
+    export PLAY_STORE_BASE_URL=http://127.0.0.1:8765
+"""
+import argparse
+import hashlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_RECORDINGS_DIR = "recordings"
+DEFAULT_PORT = 8765
+
+def recording_key(method, path, body=b""):
+    """
+    Returns the file name under which a request/response pair is recorded.
+    The key covers the method, path + query string and request body, so every
+    review page (first page and each pagination token) is stored separately.
+    """
+    digest = hashlib.sha1()
+    digest.update(method.upper().encode())
+    digest.update(b"\n")
+    digest.update(path.encode())
+    digest.update(b"\n")
+    digest.update(body or b"")
+    return f"{digest.hexdigest()}.txt"
+
+def save_recording(record_dir, method, path, body, text):
+    """
+    Stores a response body for later replay.
+    """
+    os.makedirs(record_dir, exist_ok=True)
+    with open(os.path.join(record_dir, recording_key(method, path, body)), "w", encoding="utf-8") as f:
+        f.write(text)
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive between requests
+    protocol_version = "HTTP/1.1"
+
+    def _replay(self, body=b""):
+        server = self.server
+        path = os.path.join(server.record_dir, recording_key(self.command, self.path, body))
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        if not os.path.exists(path):
+            server.count_request(hit=False)
+            payload = b"No recording for this request."
+            self.send_response(404)
+        else:
+            server.count_request(hit=True)
+            with open(path, "rb") as f:
+                payload = f.read()
+            self.send_response(200)
+
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._replay()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self._replay(self.rfile.read(length) if length else b"")
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, record_dir=DEFAULT_RECORDINGS_DIR, host="127.0.0.1", port=DEFAULT_PORT,
+                 latency=0.0, verbose=False):
+        super().__init__((host, port), ReplayHandler)
+        self.record_dir = record_dir
+        self.latency = latency
+        self.verbose = verbose
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def start(self):
+        """
+        Serves in a background thread (for use from scripts and benchmarks).
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded Play Store pages locally.")
+    parser.add_argument("--dir", default=DEFAULT_RECORDINGS_DIR, help="Directory with recorded pages")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial delay per request (seconds)")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dir):
+        print(f"❌ Recordings directory '{args.dir}' not found. Record a scrape first (PLAY_RECORD_DIR).")
+    else:
+        server = ReplayServer(args.dir, args.host, args.port, args.latency, args.verbose)
+        print(f"🎞️  Replaying {len(os.listdir(args.dir))} recorded pages from '{args.dir}'")
+        print(f"   Listening on {server.base_url} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print(f"\n   Served {server.hits} recorded pages, {server.misses} misses.")
+        finally:
+            server.server_close()
@@ -1,8 +1,17 @@
 #!/usr/bin/env python3
+import argparse
 import pandas as pd
 import os
 import google.generativeai as genai
+from google.api_core import exceptions as api_exceptions
 import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import review_rollups
+import release_monitor
+import review_search
+import issue_tracker
+import profiling
+import review_normalizer
 
 # API Key Configuration
 # SECURITY WARNING: Do not commit your actual API key to GitHub!
@@ -14,6 +23,44 @@ MODEL_NAME = 'models/gemini-2.5-pro'
 
 BATCH_SIZE = 10  # Increase to 50 to save (marginal) cost and improve speed
 
+# Cost estimation assumptions (per review, incl. prompt overhead)
+EST_INPUT_TOKENS_PER_REVIEW = 60
+EST_OUTPUT_TOKENS_PER_REVIEW = 10
+
+# Classification used for reviews that are never sent (empty) or that the model skipped
+DEFAULT_CLASSIFICATION = ("General Feedback", "Low")
+
+# API errors worth retrying elsewhere or later (see is_retryable_error): the
+# key or its quota, and transient service problems. Anything else - e.g. a
+# blocked prompt without response text - fails the same way on every retry.
+KEY_ERRORS = (api_exceptions.TooManyRequests, api_exceptions.Forbidden, api_exceptions.Unauthorized)
+TRANSIENT_ERRORS = (api_exceptions.ServerError, ConnectionError, TimeoutError)
+
+# Review normalization: clean the prompt text locally and skip empty reviews (see review_normalizer.py)
+NORMALIZE_REVIEWS = os.getenv("REVIEW_NORMALIZATION", "1") == "1"
+
+# Request Hedging Configuration
+# When enabled, a batch that is still running after HEDGE_PERCENTILE of the
+# observed batch latencies gets a duplicate request; whichever succeeds first wins.
+HEDGE_REQUESTS = os.getenv("GEMINI_HEDGE_REQUESTS", "0") == "1"
+HEDGE_PERCENTILE = 95          # Latency percentile that triggers a hedge
+HEDGE_MIN_SAMPLES = 5          # Observed batches required before hedging starts
+HEDGE_MAX_RATE = 0.10          # At most 10% of batches may be hedged
+HEDGE_MAX_WASTED_TOKENS = 50_000  # Stop hedging once duplicates have burned this many tokens
+
+# Rollups: fold each analyzed batch into outputs/rollups.db (see review_rollups.py)
+ROLLUPS_ENABLED = os.getenv("REVIEW_ROLLUPS", "1") == "1"
+
+# Release monitor: watch each analyzed batch for version regressions (see release_monitor.py)
+RELEASE_MONITOR_ENABLED = os.getenv("RELEASE_MONITOR", "1") == "1"
+
+# Search index: store classifications next to the review text (see review_search.py)
+SEARCH_INDEX_ENABLED = os.getenv("REVIEW_SEARCH_INDEX", "1") == "1"
+
+# Issue tracking: cluster bug reports into persistent issues (see issue_tracker.py)
+ISSUE_TRACKING_ENABLED = os.getenv("ISSUE_TRACKING", "1") == "1"
+ROADMAP_TOP_ISSUES = 20
+
 def get_api_key():
     """
     Gets the API key from environment variable or prompts user for input.
@@ -66,11 +113,13 @@ def configure_llm():
         print(f"   Will attempt to use {MODEL_NAME} anyway...")
         return MODEL_NAME
 
-def analyze_reviews_batch(model_name, reviews, app_context):
+def classify_reviews(model_name, reviews, app_context):
     """
     Sends a batch of reviews to the LLM for classification and prioritization.
+    Raises on API errors; reviews missing from the response get DEFAULT_CLASSIFICATION.
     """
-    indexed_reviews = "\n".join([f"[{i}] {r}" for i, r in enumerate(reviews)])
+    with profiling.span("llm.build_prompt", reviews=len(reviews)):
+        indexed_reviews = "\n".join([f"[{i}] {r}" for i, r in enumerate(reviews)])
     
     prompt = f"""
     You are a Product Manager assistant for the app '{app_context}'. Analyze these {len(reviews)} reviews:
@@ -89,37 +138,309 @@ def analyze_reviews_batch(model_name, reviews, app_context):
     [1] General Feedback | Low
     """
     
-    try:
-        model = genai.GenerativeModel(model_name)
+    model = genai.GenerativeModel(model_name)
+    with profiling.span("llm.generate_content", reviews=len(reviews)):
         response = model.generate_content(prompt)
-        results = {}
-        if response.text:
-            lines = response.text.strip().split('\n')
-            for line in lines:
-                if '[' in line and ']' in line and '|' in line:
-                    try:
-                        idx_str = line.split('[')[1].split(']')[0]
-                        idx = int(idx_str)
-                        parts = line.split(']')[1].split('|')
-                        if len(parts) >= 2:
-                            results[idx] = (parts[0].strip(), parts[1].strip())
-                    except:
-                        continue
-        
-        # Return ordered list
-        output = []
-        for i in range(len(reviews)):
-            output.append(results.get(i, ("General Feedback", "Low")))
-        return output
+    results = {}
+    if response.text:
+        lines = response.text.strip().split('\n')
+        for line in lines:
+            if '[' in line and ']' in line and '|' in line:
+                try:
+                    idx_str = line.split('[')[1].split(']')[0]
+                    idx = int(idx_str)
+                    parts = line.split(']')[1].split('|')
+                    if len(parts) >= 2:
+                        results[idx] = (parts[0].strip(), parts[1].strip())
+                except:
+                    continue
+    
+    # Return ordered list
+    output = []
+    for i in range(len(reviews)):
+        output.append(results.get(i, DEFAULT_CLASSIFICATION))
+    return output
 
+def analyze_reviews_batch(model_name, reviews, app_context, strict=False):
+    """
+    Like classify_reviews, but an API error gives the whole batch default
+    classifications instead of stopping the analysis.
+    With strict=True retryable errors (see is_retryable_error) are raised instead.
+    """
+    try:
+        return classify_reviews(model_name, reviews, app_context)
     except Exception as e:
-        print(f"⚠️ Error with {model_name}: {e}")
-        print(f"   Returning default classifications for this batch.")
-        return [("General Feedback", "Low")] * len(reviews)
+        if strict and is_retryable_error(e):
+            raise
+        return default_classifications(model_name, reviews, e)
 
-def generate_roadmap(model_name, df, app_context, output_dir):
+def is_key_error(error):
+    """
+    True for errors caused by the API key or its quota rather than the request.
+    """
+    if isinstance(error, KEY_ERRORS):
+        return True
+    return isinstance(error, api_exceptions.BadRequest) and "API key" in str(error)
+
+def is_retryable_error(error):
+    """
+    True if the same request may succeed with another key or a bit later.
+    """
+    return is_key_error(error) or isinstance(error, TRANSIENT_ERRORS)
+
+def default_classifications(model_name, reviews, error):
+    """
+    Reports a failed API call and returns DEFAULT_CLASSIFICATION for every review.
+    """
+    print(f"⚠️ Error with {model_name}: {error}")
+    print(f"   Returning default classifications for this batch.")
+    return [DEFAULT_CLASSIFICATION] * len(reviews)
+
+def prepare_prompt_texts(texts):
+    """
+    Prompt texts for a review_text column, as a frame with 'text', 'skip',
+    'tokens_before' and 'tokens_after' (see review_normalizer.prepare_reviews).
+    With normalization disabled the texts are sent as before and nothing is skipped.
+    """
+    if NORMALIZE_REVIEWS:
+        with profiling.span("pandas.normalize_reviews", rows=len(texts)):
+            return review_normalizer.prepare_reviews(texts)
+    raw = texts.map(str)
+    tokens = review_normalizer.estimate_tokens(raw)
+    return pd.DataFrame({'text': raw, 'skip': False, 'tokens_before': tokens, 'tokens_after': tokens},
+                        index=texts.index)
+
+def plan_batches(skip, batch_size=BATCH_SIZE, start=0, end=None):
+    """
+    Splits rows [start, end) into (start, end) ranges holding up to batch_size
+    reviews to send each. Skipped rows ride along in the range they fall into,
+    so every request still carries a full batch.
+    """
+    end = len(skip) if end is None else end
+    bounds = []
+    batch_start, pending = start, 0
+    for row in range(start, end):
+        if skip[row]:
+            continue
+        if pending == batch_size:
+            bounds.append((batch_start, row))
+            batch_start, pending = row, 0
+        pending += 1
+    if batch_start < end:
+        bounds.append((batch_start, end))
+    return bounds
+
+def classify_batch(model_name, texts, skip, app_context, hedger=None, strict=False):
+    """
+    Classifies one planned batch. Skipped rows get DEFAULT_CLASSIFICATION
+    without being sent; returns one (category, priority) per row.
+    With strict=True retryable API errors are raised instead of defaulted
+    (see is_retryable_error).
+    """
+    send = [text for text, skipped in zip(texts, skip) if not skipped]
+    if not send:
+        return [DEFAULT_CLASSIFICATION] * len(texts)
+    if hedger:
+        results = iter(hedger.run(model_name, send, app_context, strict))
+    else:
+        results = iter(analyze_reviews_batch(model_name, send, app_context, strict))
+    return [DEFAULT_CLASSIFICATION if skipped else next(results) for skipped in skip]
+
+class BatchHedger:
+    """
+    Runs classification batches on a small thread pool and hedges slow ones.
+    Tracks observed latencies, hedge rate and the tokens spent on losing duplicates.
+    """
+
+    def __init__(self, percentile=HEDGE_PERCENTILE, min_samples=HEDGE_MIN_SAMPLES,
+                 max_rate=HEDGE_MAX_RATE, max_wasted_tokens=HEDGE_MAX_WASTED_TOKENS):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_rate = max_rate
+        self.max_wasted_tokens = max_wasted_tokens
+        self.latencies = []
+        self.batches = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.wasted_input_tokens = 0
+        self.wasted_output_tokens = 0
+        # Primary + hedge, with headroom for losing duplicates that are still in flight
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm-batch")
+
+    @property
+    def wasted_tokens(self):
+        return self.wasted_input_tokens + self.wasted_output_tokens
+
+    def hedge_delay(self):
+        """
+        Returns the latency (seconds) after which a batch is hedged, or None if
+        there are not enough samples yet.
+        The delay is a percentile of all observed latencies, so hedging only
+        targets a tail smaller than (100 - percentile)% of batches: once more
+        batches than that are slow, the percentile itself lands on the slow
+        latency and nothing is hedged.
+        """
+        if len(self.latencies) < self.min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        rank = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return ordered[rank]
+
+    def _can_hedge(self, batch_tokens):
+        if (self.hedges + 1) > self.max_rate * (self.batches + 1):
+            return False
+        return self.wasted_tokens + batch_tokens <= self.max_wasted_tokens
+
+    def run(self, model_name, reviews, app_context, strict=False):
+        """
+        Classifies one batch, issuing a duplicate request if the first one is slow.
+        Returns the result of whichever request succeeds first; a request that
+        fails (e.g. a fast 429) leaves the other one running. Only if every
+        request fails is the batch defaulted (strict: retryable errors are raised).
+        """
+        args = (model_name, reviews, app_context)
+        input_tokens = len(reviews) * EST_INPUT_TOKENS_PER_REVIEW
+        output_tokens = len(reviews) * EST_OUTPUT_TOKENS_PER_REVIEW
+        batch_tokens = input_tokens + output_tokens
+        start = time.monotonic()
+        primary = self._executor.submit(classify_reviews, *args)
+        pending = {primary}
+
+        delay = self.hedge_delay()
+        if delay is not None and self._can_hedge(batch_tokens):
+            done, _ = wait(pending, timeout=delay)
+            if not done:
+                pending.add(self._executor.submit(classify_reviews, *args))
+                self.hedges += 1
+                # Only one of the two calls is useful; the other is paid for regardless
+                self.wasted_input_tokens += input_tokens
+                self.wasted_output_tokens += output_tokens
+
+        winner, errors = None, {}
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # Primary first when both finished together
+            for future in sorted(done, key=lambda f: f is not primary):
+                if future.exception() is None:
+                    winner = future
+                    break
+                errors[future] = future.exception()
+
+        self.latencies.append(time.monotonic() - start)
+        self.batches += 1
+        if winner is None:
+            error = errors.get(primary) or next(iter(errors.values()))
+            if strict and is_retryable_error(error):
+                raise error
+            return default_classifications(model_name, reviews, error)
+        if winner is not primary:
+            self.hedge_wins += 1
+        return winner.result()
+
+    def shutdown(self):
+        # Don't block on losing duplicates that are still waiting on the API
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def report(self):
+        rate = (self.hedges / self.batches * 100) if self.batches else 0.0
+        print(f"   - Hedged Batches: {self.hedges}/{self.batches} ({rate:.1f}%), "
+              f"{self.hedge_wins} won by the duplicate")
+        print(f"   - Wasted Tokens (hedging): ~{self.wasted_input_tokens:,} input, "
+              f"~{self.wasted_output_tokens:,} output")
+
+def open_rollups(output_dir):
+    """
+    Opens the rollup database next to the analyzed CSVs, or returns None if
+    rollups are disabled or unavailable.
+    """
+    if not ROLLUPS_ENABLED:
+        return None
+    try:
+        return review_rollups.connect(os.path.join(output_dir, "rollups.db"))
+    except Exception as e:
+        print(f"⚠️ Rollups disabled for this run: {e}")
+        return None
+
+def open_search_index(output_dir):
+    """
+    Opens the full-text search index next to the analyzed CSVs, or returns None
+    if indexing is disabled or unavailable.
+    """
+    if not SEARCH_INDEX_ENABLED:
+        return None
+    try:
+        return review_search.connect(os.path.join(output_dir, "reviews_search.db"))
+    except Exception as e:
+        print(f"⚠️ Search indexing disabled for this run: {e}")
+        return None
+
+class AnalysisSinks:
+    """
+    Everything that consumes classified batches as they land: rollups, release
+    monitor, search index and issue tracker. Each one is optional and a failing
+    sink never interrupts the analysis.
+    """
+
+    def __init__(self, output_dir, app_context):
+        self.app_context = app_context
+        self.rollup_conn = open_rollups(output_dir)
+        self.monitor_path = os.path.join(output_dir, "release_monitor.json")
+        self.monitor = release_monitor.load_monitor(app_context, self.monitor_path) if RELEASE_MONITOR_ENABLED else None
+        self.search_conn = open_search_index(output_dir)
+        self.issue_dir = os.path.join(output_dir, "issue_index")
+        self.tracker = issue_tracker.IssueTracker.load(app_context, self.issue_dir) if ISSUE_TRACKING_ENABLED else None
+
+        # (profiling span, name in warnings, callable taking the classified rows)
+        self._sinks = []
+        if self.rollup_conn:
+            self._sinks.append(("rollups", "Rollup",
+                                lambda rows: review_rollups.add_reviews(self.rollup_conn, app_context, rows)))
+        if self.monitor:
+            self._sinks.append(("release_monitor", "Release monitor", self._observe_releases))
+        if self.search_conn:
+            self._sinks.append(("search_index", "Search index",
+                                lambda rows: review_search.add_reviews(self.search_conn, app_context, rows)))
+        if self.tracker:
+            self._sinks.append(("issue_tracker", "Issue tracking", self.tracker.add_frame))
+
+    def _observe_releases(self, rows):
+        for alert in self.monitor.observe_frame(rows):
+            print(f"\n{release_monitor.format_alert(alert)}")
+
+    def feed(self, rows, batch_results):
+        """
+        Passes one classified batch (source rows + [(category, priority)]) to every sink.
+        """
+        if not self._sinks:
+            return
+        rows = rows.copy()
+        rows['category'] = [cat for cat, _ in batch_results]
+        rows['priority'] = [prio for _, prio in batch_results]
+        for span, name, sink in self._sinks:
+            with profiling.span(f"sinks.{span}"):
+                try:
+                    sink(rows)
+                except Exception as e:
+                    print(f"\n⚠️ {name} update failed: {e}")
+
+    def top_issues(self, n=ROADMAP_TOP_ISSUES):
+        # Only issues with current High-priority reports belong under "Must-Fix"
+        return self.tracker.top_issues(n, priority="High") if self.tracker else None
+
+    def close(self):
+        if self.rollup_conn:
+            self.rollup_conn.close()
+        if self.monitor:
+            release_monitor.save_monitor(self.monitor, self.monitor_path)
+        if self.search_conn:
+            self.search_conn.close()
+        if self.tracker:
+            self.tracker.save(self.issue_dir)
+
+def generate_roadmap(model_name, df, app_context, output_dir, issues=None):
     """
     Generates a tactical product roadmap based on the analyzed reviews.
+    If tracked issues are given, they replace the raw sample of critical bug reports.
     """
     print(f"\n🗺️  Generating Product Roadmap for {app_context}...")
     
@@ -130,7 +451,12 @@ def generate_roadmap(model_name, df, app_context, output_dir):
     
     # Take a sample to fit in context
     features_sample = "\n- ".join(features[:50]) 
-    bugs_sample = "\n- ".join(critical_bugs[:20])
+    if issues:
+        bugs_heading = "Critical Bug Reports (tracked issues with High-priority reports, most recent and frequent first)"
+        bugs_sample = "\n- ".join(issue_tracker.format_issue(issue) for issue in issues)
+    else:
+        bugs_heading = "Critical Bug Reports"
+        bugs_sample = "\n- ".join(critical_bugs[:20])
     
     prompt = f"""
 **Context:**
@@ -141,7 +467,7 @@ def generate_roadmap(model_name, df, app_context, output_dir):
 *Feature Requests:*
 {features_sample}
 
-*Critical Bug Reports:*
+*{bugs_heading}:*
 {bugs_sample}
 
 **Instructions:**
@@ -176,7 +502,8 @@ Avoid corporate jargon. Be specific, technical, and solution-oriented.
     
     try:
         model = genai.GenerativeModel(model_name)
-        response = model.generate_content(prompt)
+        with profiling.span("llm.roadmap"):
+            response = model.generate_content(prompt)
         if response.text:
             roadmap_path = os.path.join(output_dir, f"{app_context}_roadmap.md")
             with open(roadmap_path, "w", encoding="utf-8") as f:
@@ -190,7 +517,8 @@ Avoid corporate jargon. Be specific, technical, and solution-oriented.
 def analyze_dataset(file_path):
     print(f"\n🔄 Analyzing: {file_path}")
     try:
-        df = pd.read_csv(file_path)
+        with profiling.span("csv.read", path=os.path.basename(file_path)):
+            df = pd.read_csv(file_path)
         
         if 'review_text' not in df.columns:
             print("❌ Error: CSV must contain a 'review_text' column.")
@@ -198,7 +526,8 @@ def analyze_dataset(file_path):
 
         # Setup LLM
         try:
-            model_name = configure_llm()
+            with profiling.span("llm.configure"):
+                model_name = configure_llm()
         except Exception as e:
             print(f"❌ Failed to configure LLM: {e}")
             return
@@ -211,30 +540,36 @@ def analyze_dataset(file_path):
         print("   💡 Tip: Press Ctrl+C to interrupt and save partial results (requires ≥200 reviews for roadmap)")
         print()
         
-        categories = []
-        priorities = []
+        classified = []  # (category, priority) per analyzed row
         total = len(df)
-        all_reviews = df['review_text'].tolist()
+        prepared = prepare_prompt_texts(df['review_text'])
+        prompt_texts = prepared['text'].tolist()
+        skip = prepared['skip'].tolist()
         analyzed_count = 0
         MIN_REVIEWS_FOR_ROADMAP = 200
+        hedger = BatchHedger() if HEDGE_REQUESTS else None
+        sinks = AnalysisSinks(os.path.dirname(file_path), app_context)
 
         try:
-            for i in range(0, total, BATCH_SIZE):
-                batch = all_reviews[i : i + BATCH_SIZE]
-                batch_results = analyze_reviews_batch(model_name, batch, app_context)
+            for i, end in plan_batches(skip, BATCH_SIZE):
+                with profiling.span("analysis.batch", start_row=i):
+                    batch_results = classify_batch(model_name, prompt_texts[i:end], skip[i:end], app_context, hedger)
                 
-                for cat, prio in batch_results:
-                    categories.append(cat)
-                    priorities.append(prio)
-                
-                analyzed_count = len(categories)
+                # One extend and the count first: an interrupt inside the sinks
+                # still keeps this batch in the saved CSV
+                classified.extend(batch_results)
+                analyzed_count = len(classified)
+                sinks.feed(df.iloc[i : i + len(batch_results)], batch_results)
                 print(f"   Processed {analyzed_count}/{total} reviews...", end='\r')
-                time.sleep(1.0) # Rate limiting: 1 batch per second is much faster than 1 review per second
+                if not all(skip[i:end]):
+                    with profiling.span("analysis.rate_limit_sleep"):
+                        time.sleep(1.0) # Rate limiting: 1 batch per second is much faster than 1 review per second
 
             # If we completed all reviews
             print(f"\n✅ Analysis Complete! Processed all {total} reviews.")
             
         except KeyboardInterrupt:
+            analyzed_count = len(classified)
             print(f"\n\n⚠️ Analysis interrupted by user.")
             print(f"   Processed {analyzed_count} out of {total} reviews.")
             
@@ -245,16 +580,21 @@ def analyze_dataset(file_path):
                 print(f"   Partial analysis will still be saved.")
             else:
                 print(f"   ✅ Sufficient reviews ({analyzed_count} ≥ {MIN_REVIEWS_FOR_ROADMAP}) - roadmap will be generated.")
+        finally:
+            if hedger:
+                hedger.shutdown()
+            sinks.close()
 
         # Create a dataframe with only analyzed reviews
         # Take only the rows that were successfully analyzed
         df_analyzed = df.iloc[:analyzed_count].copy()
-        df_analyzed['category'] = categories
-        df_analyzed['priority'] = priorities
+        df_analyzed['category'] = [cat for cat, _ in classified]
+        df_analyzed['priority'] = [prio for _, prio in classified]
         
         # Save with suffix
         output_path = file_path.replace(".csv", "_analyzed_ai.csv")
-        df_analyzed.to_csv(output_path, index=False)
+        with profiling.span("csv.write", rows=len(df_analyzed)):
+            df_analyzed.to_csv(output_path, index=False)
         
         print(f"\n💾 Analysis saved to: {output_path}")
         print(f"   - Reviews Analyzed: {len(df_analyzed)}")
@@ -264,15 +604,27 @@ def analyze_dataset(file_path):
         # Estimate Cost (Gemini 2.5 Pro pricing)
         # Assumptions: ~60 input tokens per review (incl prompt overhead), ~10 output tokens per review
         # Gemini 2.5 Pro: $1.25 per 1M input tokens, $5.00 per 1M output tokens
-        est_input_tokens = analyzed_count * 60
-        est_output_tokens = analyzed_count * 10
+        # Skipped reviews are never sent; normalization trims the text of the rest
+        normalized = prepared.iloc[:analyzed_count]
+        sent_count = int((~normalized['skip']).sum())
+        tokens_saved = int((normalized['tokens_before'] - normalized['tokens_after'])[~normalized['skip']].sum())
+        est_input_tokens = max(sent_count * EST_INPUT_TOKENS_PER_REVIEW - tokens_saved, 0)
+        est_output_tokens = sent_count * EST_OUTPUT_TOKENS_PER_REVIEW
+        if hedger:
+            # Losing duplicates are billed too, each part at its own rate
+            est_input_tokens += hedger.wasted_input_tokens
+            est_output_tokens += hedger.wasted_output_tokens
         est_cost = (est_input_tokens / 1_000_000 * 1.25) + (est_output_tokens / 1_000_000 * 5.00)
         print(f"   - Estimated Cost (Gemini 2.5 Pro): ~${est_cost:.4f}")
+        if NORMALIZE_REVIEWS:
+            print(f"   - Normalization: {review_normalizer.format_savings(normalized)}")
+        if hedger:
+            hedger.report()
         
         # Generate Strategic Roadmap only if we have enough reviews
         if analyzed_count >= MIN_REVIEWS_FOR_ROADMAP:
             print(f"\n🗺️  Generating Product Roadmap (based on {analyzed_count} analyzed reviews)...")
-            generate_roadmap(model_name, df_analyzed, app_context, os.path.dirname(file_path))
+            generate_roadmap(model_name, df_analyzed, app_context, os.path.dirname(file_path), sinks.top_issues())
         else:
             print(f"\n⚠️  Product Roadmap not generated.")
             print(f"   Reason: Too few reviews analyzed ({analyzed_count} < {MIN_REVIEWS_FOR_ROADMAP} minimum required)")
@@ -282,6 +634,12 @@ def analyze_dataset(file_path):
         print(f"❌ Analysis failed: {e}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze fetched reviews with Gemini and generate a roadmap.")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    if args.profile:
+        profiling.start("playstore_analysis", args.profile, args.profile_dir)
+
     output_dir = "outputs"
     if not os.path.exists(output_dir):
         print(f"❌ Directory '{output_dir}' not found. Please fetch reviews first.")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Built-in profiling for the scraper and the analysis pipeline.
+
+Stages are wrapped in `span(...)` blocks. Spans cost nothing until profiling
+is started with --profile; then every span is recorded as a Chrome
+trace event (open the .trace.json in chrome://tracing or https://ui.perfetto.dev),
+optionally alongside cProfile and tracemalloc data, and a top-N hotspot
+summary is written at exit.
+
+    --profile               timing spans only
+    --profile cpu           spans + cProfile
+    --profile memory        spans + tracemalloc
+    --profile all           everything
+"""
+import argparse
+import atexit
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+DEFAULT_PROFILE_DIR = os.path.join("outputs", "profiles")
+TOP_N = 15
+PROFILE_MODES = ("spans", "cpu", "memory", "all")
+
+_profiler = None
+
+class Profiler:
+    """
+    Collects timing spans (and optionally cProfile/tracemalloc data) for one run.
+    """
+
+    def __init__(self, name, cpu=False, memory=False, output_dir=DEFAULT_PROFILE_DIR):
+        self.name = name
+        self.output_dir = output_dir
+        self.events = []
+        self.pid = os.getpid()
+        self._origin = time.perf_counter_ns()
+        self._cpu = cProfile.Profile() if cpu else None
+        self._memory = memory
+        self._memory_start = None
+
+    def start(self):
+        if self._memory:
+            tracemalloc.start(10)
+            self._memory_start = tracemalloc.take_snapshot()
+        if self._cpu:
+            self._cpu.enable()
+        return self
+
+    @contextmanager
+    def span(self, name, **args):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            # list.append is atomic, so spans from hedging/worker threads are safe
+            self.events.append({
+                "name": name,
+                "cat": name.split(".")[0],
+                "ph": "X",
+                "ts": (start - self._origin) / 1000,
+                "dur": (end - start) / 1000,
+                "pid": self.pid,
+                "tid": threading.get_ident(),
+                "args": args,
+            })
+
+    def _span_summary(self):
+        totals = defaultdict(lambda: [0, 0.0, 0.0])
+        for event in self.events:
+            entry = totals[event["name"]]
+            entry[0] += 1
+            entry[1] += event["dur"] / 1000
+            entry[2] = max(entry[2], event["dur"] / 1000)
+        lines = [f"{'Span':<32} {'Calls':>7} {'Total ms':>12} {'Mean ms':>10} {'Max ms':>10}"]
+        for name, (calls, total, longest) in sorted(totals.items(), key=lambda kv: kv[1][1], reverse=True)[:TOP_N]:
+            lines.append(f"{name:<32} {calls:>7} {total:>12.1f} {total / calls:>10.1f} {longest:>10.1f}")
+        return lines
+
+    def stop(self):
+        """
+        Stops collection and writes the trace and summary. Returns (trace_path, summary_path).
+        """
+        if self._cpu:
+            self._cpu.disable()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        base = os.path.join(self.output_dir, f"{self.name}_{stamp}")
+
+        stages = self._span_summary()
+        summary = [f"Profile: {self.name} ({time.strftime('%Y-%m-%d %H:%M:%S')})", "", "== Stages =="] + stages
+
+        if self._cpu:
+            stream = io.StringIO()
+            stats = pstats.Stats(self._cpu, stream=stream)
+            stats.sort_stats("cumulative").print_stats(TOP_N)
+            stats.dump_stats(base + ".prof")
+            summary += ["", f"== CPU hotspots (cProfile, top {TOP_N} by cumulative time; full data: {base}.prof) =="]
+            summary += stream.getvalue().strip().splitlines()
+
+        if self._memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            summary += ["", f"== Memory (tracemalloc) current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB ==",
+                        f"Top {TOP_N} allocation growth by line:"]
+            for stat in snapshot.compare_to(self._memory_start, "lineno")[:TOP_N]:
+                summary.append(f"  {stat}")
+
+        with open(base + ".trace.json", "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+        with open(base + ".summary.txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(summary) + "\n")
+
+        print(f"\n⏱️  Profile written: {base}.trace.json")
+        print("\n".join(stages[:9]))
+        print(f"   Full summary: {base}.summary.txt")
+        return base + ".trace.json", base + ".summary.txt"
+
+def span(name, **args):
+    """
+    Times a stage when profiling is active; a no-op context otherwise.
+    """
+    if _profiler is None:
+        return nullcontext()
+    return _profiler.span(name, **args)
+
+def start(name, mode="spans", output_dir=DEFAULT_PROFILE_DIR):
+    """
+    Starts profiling for this process and writes the results at exit.
+    mode: 'spans', 'cpu', 'memory' or 'all' (comma-separated combinations allowed).
+    """
+    global _profiler
+    modes = {m.strip() for m in mode.split(",")}
+    unknown = modes - set(PROFILE_MODES)
+    if unknown:
+        raise ValueError(f"❌ Unknown profile mode(s): {', '.join(sorted(unknown))}. Choose from {', '.join(PROFILE_MODES)}.")
+
+    _profiler = Profiler(
+        name,
+        cpu=bool(modes & {"cpu", "all"}),
+        memory=bool(modes & {"memory", "all"}),
+        output_dir=output_dir,
+    ).start()
+    atexit.register(stop)
+    print(f"⏱️  Profiling enabled ({', '.join(sorted(modes))})")
+    return _profiler
+
+def stop():
+    """
+    Writes the profile (idempotent; also runs at exit).
+    """
+    global _profiler
+    if _profiler is None:
+        return None
+    profiler, _profiler = _profiler, None
+    return profiler.stop()
+
+def profile_mode(value):
+    """
+    argparse type for --profile: validates and normalizes a (comma-separated) mode.
+    """
+    modes = [m.strip() for m in value.split(",") if m.strip()]
+    unknown = sorted(set(modes) - set(PROFILE_MODES))
+    if unknown or not modes:
+        raise argparse.ArgumentTypeError(
+            f"unknown profile mode '{value}' (choose from {', '.join(PROFILE_MODES)}, comma-separated)")
+    return ",".join(modes)
+
+def add_arguments(parser):
+    """
+    Adds the shared --profile option to an entry point's argument parser.
+    """
+    parser.add_argument(
+        "--profile", nargs="?", const="spans", default=None, metavar="MODE", type=profile_mode,
+        help="Profile this run: spans (default), cpu (cProfile), memory (tracemalloc) or all",
+    )
+    parser.add_argument("--profile-dir", default=DEFAULT_PROFILE_DIR,
+                        help=f"Where profiles are written (default {DEFAULT_PROFILE_DIR})")
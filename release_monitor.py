@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Streaming release-regression detector.
+
+Keeps constant-size running statistics per app version (rating mean/variance,
+bug-report rate, High-priority rate) and compares every new version against
+the trailing baseline of the previous releases with a one-sided sequential
+probability ratio test (CUSUM form). An alert is emitted as soon as a metric
+crosses the decision threshold, so a bad release is flagged while reviews are
+still streaming in instead of after a batch recomputation.
+
+Reviews may arrive in any order (the scraper fetches newest first). Reviews of
+a version that has no baseline yet are held back as pending statistics and
+tested in one step as soon as enough older releases have been seen.
+
+Usage:
+    python release_monitor.py outputs/com.spotify.music_reviews_analyzed_ai.csv
+"""
+import argparse
+import base64
+import bisect
+import hashlib
+import json
+import math
+import os
+import re
+import zlib
+
+import pandas as pd
+
+import review_rollups  # shared app-name and review-key conventions
+
+DEFAULT_STATE_PATH = os.path.join("outputs", "release_monitor.json")
+
+# Test configuration
+ALPHA = 0.01                 # False alarm probability per version/metric
+BETA = 0.05                  # Missed regression probability
+BASELINE_VERSIONS = 3        # Number of previous releases that form the baseline
+MIN_BASELINE_SAMPLES = 50    # Reviews required in the baseline before testing
+RATE_LIFT = 1.5              # Alternative hypothesis: rate is 1.5x the baseline...
+MIN_RATE_DELTA = 0.05        # ...and at least 5 percentage points higher
+RATING_DROP = 0.5            # Alternative hypothesis: mean rating drops by 0.5 stars
+MIN_RATING_VARIANCE = 0.25
+
+THRESHOLD = math.log((1 - BETA) / ALPHA)
+
+# Counted-review filter: fixed size, about 1% false positives at ~440k reviews per app
+SEEN_FILTER_BITS = 2 ** 22
+SEEN_FILTER_HASHES = 7
+
+METRICS = {
+    'bug_rate': "Bug report rate",
+    'high_rate': "High-priority rate",
+    'rating': "Average rating",
+}
+
+def parse_version(version):
+    """
+    Turns '8.9.12.345' into (8, 9, 12, 345) for ordering. Returns None for
+    missing or unparseable versions.
+    """
+    if version is None or (isinstance(version, float) and math.isnan(version)):
+        return None
+    parts = re.findall(r"\d+", str(version))
+    return tuple(int(p) for p in parts) if parts else None
+
+class VersionStats:
+    """
+    Running statistics for one version (Welford's algorithm for the rating).
+    """
+    __slots__ = ("n", "rated", "mean", "m2", "bugs", "high")
+
+    def __init__(self, n=0, rated=0, mean=0.0, m2=0.0, bugs=0, high=0):
+        self.n = n
+        self.rated = rated
+        self.mean = mean
+        self.m2 = m2
+        self.bugs = bugs
+        self.high = high
+
+    def add(self, rating, is_bug, is_high):
+        self.n += 1
+        self.bugs += is_bug
+        self.high += is_high
+        if rating is not None:
+            self.rated += 1
+            delta = rating - self.mean
+            self.mean += delta / self.rated
+            self.m2 += delta * (rating - self.mean)
+
+    def merge(self, other):
+        """
+        Combines two running statistics (Chan et al. parallel variance).
+        """
+        merged = VersionStats(self.n + other.n, self.rated + other.rated, 0.0, 0.0,
+                              self.bugs + other.bugs, self.high + other.high)
+        if merged.rated:
+            delta = other.mean - self.mean
+            merged.mean = self.mean + delta * other.rated / merged.rated
+            merged.m2 = self.m2 + other.m2 + delta * delta * self.rated * other.rated / merged.rated
+        return merged
+
+    @property
+    def variance(self):
+        return self.m2 / (self.rated - 1) if self.rated > 1 else 0.0
+
+    def rate(self, metric):
+        if not self.n:
+            return 0.0
+        return (self.bugs if metric == 'bug_rate' else self.high) / self.n
+
+    def to_list(self):
+        return [self.n, self.rated, self.mean, self.m2, self.bugs, self.high]
+
+class SeenFilter:
+    """
+    Fixed-size Bloom filter of review keys already counted. State size does not
+    grow with the number of reviews; a false positive skips a new review, it
+    never counts one twice.
+    """
+
+    def __init__(self, bits=None):
+        self.bits = bytearray(SEEN_FILTER_BITS // 8) if bits is None else bytearray(bits)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % SEEN_FILTER_BITS for i in range(SEEN_FILTER_HASHES)]
+
+    def add(self, key):
+        """
+        Adds a key. Returns False if it was (probably) added before.
+        """
+        added = False
+        for pos in self._positions(key):
+            byte, bit = divmod(pos, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                added = True
+        return added
+
+    def to_str(self):
+        return base64.b64encode(zlib.compress(bytes(self.bits))).decode("ascii")
+
+    @classmethod
+    def from_str(cls, data):
+        return cls(zlib.decompress(base64.b64decode(data)))
+
+class ReleaseMonitor:
+    """
+    Per-app detector state: one VersionStats and one log-likelihood ratio per
+    version and metric.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.versions = {}      # version -> VersionStats
+        self.llr = {}           # version -> {metric: log-likelihood ratio}
+        self.alerted = {}       # version -> [metrics already alerted]
+        self.pending = {}       # version -> VersionStats of reviews not yet tested (no baseline then)
+        self.seen = SeenFilter()  # app|reviewId of reviews already counted, in any market
+        self._order = []        # Sorted (parsed version, version) for baseline lookups
+
+    def baseline(self, version):
+        """
+        Merged statistics of the releases preceding `version`.
+        Returns (stats, [versions]) or (None, []) when there is not enough history.
+        """
+        idx = bisect.bisect_left(self._order, (parse_version(version),))
+        older = [v for _, v in self._order[max(0, idx - BASELINE_VERSIONS):idx]]
+        if not older:
+            return None, []
+
+        stats = VersionStats()
+        for v in older:
+            stats = stats.merge(self.versions[v])
+        if stats.n < MIN_BASELINE_SAMPLES:
+            return None, []
+        return stats, older
+
+    def _increments(self, baseline, reviews):
+        """
+        Log-likelihood ratio increments (H1: regression vs H0: baseline) for a
+        group of reviews summarized as VersionStats (a single review is a group of one).
+        Both log-likelihood ratios are linear in the counts and the rating sum,
+        so a group's increment equals the sum of its per-review increments.
+        """
+        increments = {}
+        for metric, hits in (('bug_rate', reviews.bugs), ('high_rate', reviews.high)):
+            p0 = min(max(baseline.rate(metric), 0.01), 0.98)
+            p1 = min(max(p0 * RATE_LIFT, p0 + MIN_RATE_DELTA), 0.99)
+            increments[metric] = hits * math.log(p1 / p0) + (reviews.n - hits) * math.log((1 - p1) / (1 - p0))
+
+        if reviews.rated and baseline.rated:
+            mu0 = baseline.mean
+            mu1 = mu0 - RATING_DROP
+            var = max(baseline.variance, MIN_RATING_VARIANCE)
+            # sum over ratings r of ((r - mu0)^2 - (r - mu1)^2) / (2 var)
+            increments['rating'] = (mu1 - mu0) * reviews.rated * (2 * reviews.mean - mu0 - mu1) / (2 * var)
+        return increments
+
+    def _test(self, version, reviews, baseline, baseline_versions):
+        """
+        Adds the evidence of `reviews` to the version's tests. Returns new alerts.
+        """
+        stats = self.versions[version]
+        alerts = []
+        llr = self.llr.setdefault(version, {})
+        alerted = self.alerted.setdefault(version, [])
+        for metric, increment in self._increments(baseline, reviews).items():
+            # Clamp at zero so evidence from a good start doesn't mask a later regression
+            llr[metric] = max(0.0, llr.get(metric, 0.0) + increment)
+            if llr[metric] >= THRESHOLD and metric not in alerted:
+                alerted.append(metric)
+                alerts.append({
+                    'app': self.app,
+                    'version': version,
+                    'metric': metric,
+                    'baseline_versions': baseline_versions,
+                    'baseline': baseline.mean if metric == 'rating' else baseline.rate(metric),
+                    'current': stats.mean if metric == 'rating' else stats.rate(metric),
+                    'reviews': stats.n,
+                    'llr': llr[metric],
+                })
+        return alerts
+
+    def flush_pending(self):
+        """
+        Tests held-back reviews of every version whose baseline now exists.
+        Returns the alerts raised.
+        """
+        alerts = []
+        for version in [v for _, v in self._order if v in self.pending]:
+            baseline, baseline_versions = self.baseline(version)
+            if baseline is not None:
+                alerts.extend(self._test(version, self.pending.pop(version), baseline, baseline_versions))
+        return alerts
+
+    def observe(self, version, rating=None, category=None, priority=None):
+        """
+        Feeds one analyzed review. Returns a list of alert dicts (usually empty).
+        """
+        key = parse_version(version)
+        if key is None:
+            return []
+        version = str(version)
+        if rating is not None and (isinstance(rating, float) and math.isnan(rating)):
+            rating = None
+        is_bug = int(category == 'Bug Report')
+        is_high = int(priority == 'High')
+
+        stats = self.versions.get(version)
+        if stats is None:
+            stats = self.versions[version] = VersionStats()
+            bisect.insort(self._order, (key, version))
+        stats.add(rating, is_bug, is_high)
+
+        review = VersionStats()
+        review.add(rating, is_bug, is_high)
+        baseline, baseline_versions = self.baseline(version)
+        if baseline is None:
+            # No older releases seen yet: hold the review back until they are
+            pending = self.pending.setdefault(version, VersionStats())
+            self.pending[version] = pending.merge(review)
+            return []
+
+        alerts = []
+        if version in self.pending:
+            alerts.extend(self._test(version, self.pending.pop(version), baseline, baseline_versions))
+        alerts.extend(self._test(version, review, baseline, baseline_versions))
+        return alerts
+
+    def observe_frame(self, df):
+        """
+        Feeds analyzed rows (any order; oldest first within the frame) and
+        returns all alerts raised. Reviews counted before are skipped, so
+        re-analyzing or re-merging a file does not count them twice, and a review
+        fetched for several markets is one observation, not one per market.
+        """
+        if df is None or df.empty:
+            return []
+        keys = review_rollups.review_keys(self.app, df, by_market=False)
+        rows = df[[self.seen.add(key) for key in keys]]
+        if 'date' in rows.columns:
+            dates = pd.to_datetime(rows['date'], errors='coerce')
+            rows = rows.loc[dates.sort_values(kind='stable').index]
+
+        alerts = []
+        columns = [rows[c] if c in rows.columns else [None] * len(rows)
+                   for c in ('version', 'rating', 'category', 'priority')]
+        for version, rating, category, priority in zip(*columns):
+            alerts.extend(self.observe(version, rating, category, priority))
+        # Older releases in this frame may have completed a newer version's baseline
+        alerts.extend(self.flush_pending())
+        return alerts
+
+    def to_dict(self):
+        return {
+            'versions': {v: s.to_list() for v, s in self.versions.items()},
+            'llr': self.llr,
+            'alerted': self.alerted,
+            'pending': {v: s.to_list() for v, s in self.pending.items()},
+            'seen': self.seen.to_str(),
+        }
+
+    @classmethod
+    def from_dict(cls, app, data):
+        monitor = cls(app)
+        monitor.versions = {v: VersionStats(*s) for v, s in data.get('versions', {}).items()}
+        monitor.llr = data.get('llr', {})
+        monitor.alerted = data.get('alerted', {})
+        monitor.pending = {v: VersionStats(*s) for v, s in data.get('pending', {}).items()}
+        if 'seen' in data:
+            monitor.seen = SeenFilter.from_str(data['seen'])
+        monitor._order = sorted((parse_version(v), v) for v in monitor.versions)
+        return monitor
+
+def load_monitor(app, state_path=DEFAULT_STATE_PATH):
+    """
+    Loads the detector state for one app (or starts a fresh one).
+    """
+    if os.path.exists(state_path):
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if app in state:
+            return ReleaseMonitor.from_dict(app, state[app])
+    return ReleaseMonitor(app)
+
+def save_monitor(monitor, state_path=DEFAULT_STATE_PATH):
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    state[monitor.app] = monitor.to_dict()
+
+    directory = os.path.dirname(state_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+def format_alert(alert):
+    metric = alert['metric']
+    if metric == 'rating':
+        change = f"{alert['baseline']:.2f} → {alert['current']:.2f} ⭐"
+    else:
+        change = f"{alert['baseline']:.1%} → {alert['current']:.1%}"
+    return (f"🚨 Release regression in {alert['app']} v{alert['version']}: {METRICS[metric]} {change} "
+            f"(after {alert['reviews']} reviews, baseline {', '.join(alert['baseline_versions'])})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay analyzed reviews through the release-regression detector.")
+    parser.add_argument("files", nargs="+", help="_analyzed_ai.csv files")
+    parser.add_argument("--state", default=None, help="Persist detector state to this JSON file")
+    args = parser.parse_args()
+
+    for file_path in args.files:
+        df = pd.read_csv(file_path, dtype={'version': str})
+        app = review_rollups.app_name_from_path(file_path)
+        monitor = load_monitor(app, args.state) if args.state else ReleaseMonitor(app)
+        alerts = monitor.observe_frame(df)
+
+        print(f"\n📡 {app}: {len(monitor.versions)} versions tracked")
+        for alert in alerts:
+            print(format_alert(alert))
+        if not alerts:
+            print("   ✅ No release regressions detected.")
+        if args.state:
+            save_monitor(monitor, args.state)
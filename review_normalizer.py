@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Local normalization of review text before it is sent to the LLM.
+
+Raw Play Store reviews carry a lot of tokens with no signal for classification:
+emoji runs, "soooo goooood!!!!!", repeated words, links, stray whitespace and
+NaN rows that used to be sent as the string "nan". This stage cleans a whole
+column at once with pandas string ops and precompiled regexes, caps the length
+of each review and flags rows that are empty after cleaning, so they can get a
+default classification without an API call. The original `review_text` is
+left untouched in the CSVs; only the prompt text is normalized.
+
+Usage (preview the savings for a file without calling the API):
+    python review_normalizer.py outputs/com.spotify.music_reviews.csv
+    python review_normalizer.py outputs/com.spotify.music_reviews.csv --truncate head_tail --show 5
+"""
+import argparse
+import os
+import re
+
+import pandas as pd
+
+MAX_REVIEW_CHARS = 400       # Longer reviews are cut (classification rarely needs more)
+TRUNCATE_MODES = ("head", "head_tail")
+TRUNCATE_MODE = os.getenv("REVIEW_TRUNCATE", "head")  # 'head_tail' keeps the end of long rants too
+HEAD_SHARE = 0.65            # Share of MAX_REVIEW_CHARS kept from the start in 'head_tail' mode
+EMOJI_RUN_LIMIT = 3          # Emoji kept from a run of emoji
+CHARS_PER_TOKEN = 4          # Rough token estimate for reporting savings
+ELLIPSIS = "…"
+
+# Zero-width characters, variation selectors and skin-tone modifiers: tokens without signal
+INVISIBLE_PATTERN = re.compile("[\u200b\u200c\u200d\u2060\ufeff\ufe0e\ufe0f\U0001f3fb-\U0001f3ff]")
+URL_PATTERN = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+URL_HINT = re.compile(r"://|www\.", re.IGNORECASE)
+_EMOJI = "[\U0001f000-\U0001faff\u2600-\u27bf\u2b00-\u2bff]"
+EMOJI_RUN_PATTERN = re.compile(rf"(?:{_EMOJI}\s*){{{EMOJI_RUN_LIMIT + 1},}}")
+EMOJI_PATTERN = re.compile(_EMOJI)
+# Digits are excluded so numbers like 1000 survive
+REPEATED_CHAR_PATTERN = re.compile(r"([^\d\s])\1{2,}")
+REPEATED_WORD_PATTERN = re.compile(r"\b(\w+)(?:\s+\1\b){2,}", re.IGNORECASE)
+SIGNAL_PATTERN = re.compile(r"[^\W_]")  # At least one letter or digit
+
+def _replace(texts, pattern, repl, hint=None):
+    """
+    str.replace restricted to rows matching a cheaper `hint` pattern: most
+    reviews contain no links or emoji, and scanning for one character class
+    is several times faster than running the full substitution.
+    """
+    if hint is None:
+        return texts.str.replace(pattern, repl, regex=True)
+    rows = texts.str.contains(hint)
+    if not rows.any():
+        return texts
+    texts = texts.copy()
+    texts[rows] = texts[rows].str.replace(pattern, repl, regex=True)
+    return texts
+
+def _keep_emoji(match):
+    return "".join(EMOJI_PATTERN.findall(match.group(0))[:EMOJI_RUN_LIMIT]) + " "
+
+def truncate(texts, max_chars=MAX_REVIEW_CHARS, mode=TRUNCATE_MODE):
+    """
+    Caps every text at about max_chars. 'head' keeps the beginning; 'head_tail'
+    keeps the beginning and the end, which is where many reviews state the actual
+    problem or the rating reason.
+    """
+    if mode not in TRUNCATE_MODES:
+        raise ValueError(f"❌ Unknown truncation mode '{mode}'. Choose from {', '.join(TRUNCATE_MODES)}.")
+
+    long_rows = texts.str.len() > max_chars
+    if not long_rows.any():
+        return texts
+
+    texts = texts.copy()
+    long_texts = texts[long_rows]
+    if mode == "head":
+        texts[long_rows] = long_texts.str.slice(0, max_chars).str.rstrip() + ELLIPSIS
+    else:
+        head = int(max_chars * HEAD_SHARE)
+        tail = max_chars - head
+        texts[long_rows] = (long_texts.str.slice(0, head).str.rstrip() + f" {ELLIPSIS} "
+                            + long_texts.str.slice(-tail).str.lstrip())
+    return texts
+
+def normalize_texts(texts, max_chars=MAX_REVIEW_CHARS, mode=TRUNCATE_MODE):
+    """
+    Normalizes a Series of review texts (vectorized). Missing values become "".
+    """
+    texts = texts.fillna("").astype(str)
+    texts = _replace(texts, INVISIBLE_PATTERN, "")
+    texts = _replace(texts, URL_PATTERN, "<link>", URL_HINT)
+    texts = _replace(texts, REPEATED_CHAR_PATTERN, r"\1\1")
+    texts = _replace(texts, EMOJI_RUN_PATTERN, _keep_emoji, EMOJI_PATTERN)
+    texts = _replace(texts, REPEATED_WORD_PATTERN, r"\1 \1")
+    # Collapses all whitespace runs (newlines, tabs, NBSP) and strips the ends
+    texts = texts.str.split().str.join(" ")
+    return truncate(texts, max_chars, mode)
+
+def estimate_tokens(texts):
+    """
+    Rough per-row token estimate (about 4 characters per token).
+    """
+    lengths = texts.str.len().fillna(0).astype(int)
+    return (lengths + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def prepare_reviews(texts, max_chars=MAX_REVIEW_CHARS, mode=TRUNCATE_MODE):
+    """
+    Returns a frame aligned with `texts`:
+      text           normalized prompt text
+      skip           True if nothing classifiable is left (empty, NaN, punctuation only)
+      tokens_before  estimated tokens of the text as it used to be sent (NaN as "nan")
+      tokens_after   estimated tokens actually sent (0 for skipped rows)
+    """
+    normalized = normalize_texts(texts, max_chars, mode)
+    skip = ~normalized.str.contains(SIGNAL_PATTERN)
+    prepared = pd.DataFrame({
+        'text': normalized,
+        'skip': skip,
+        # map(str): NaN used to be sent as "nan"
+        'tokens_before': estimate_tokens(texts.map(str)),
+        'tokens_after': estimate_tokens(normalized).where(~skip, 0),
+    }, index=texts.index)
+    return prepared
+
+def format_savings(prepared):
+    """
+    One-line summary of what normalization saved for the given rows.
+    """
+    before = int(prepared['tokens_before'].sum())
+    after = int(prepared['tokens_after'].sum())
+    saved = before - after
+    share = saved / before if before else 0.0
+    return (f"~{saved:,} review tokens saved ({share:.1%} of {before:,}), "
+            f"{int(prepared['skip'].sum())} empty reviews skipped")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preview review normalization and the tokens it saves.")
+    parser.add_argument("files", nargs="+", help="Review CSV files (raw or analyzed)")
+    parser.add_argument("--max-chars", type=int, default=MAX_REVIEW_CHARS)
+    parser.add_argument("--truncate", default=TRUNCATE_MODE, choices=TRUNCATE_MODES)
+    parser.add_argument("--show", type=int, default=0, metavar="N", help="Print the N most shortened reviews")
+    args = parser.parse_args()
+
+    for file_path in args.files:
+        df = pd.read_csv(file_path)
+        if 'review_text' not in df.columns:
+            print(f"❌ {file_path}: CSV must contain a 'review_text' column.")
+            continue
+        prepared = prepare_reviews(df['review_text'], args.max_chars, args.truncate)
+        print(f"✂️  {file_path}: {format_savings(prepared)}")
+        if args.show:
+            shortened = (prepared['tokens_before'] - prepared['tokens_after']).nlargest(args.show)
+            for idx in shortened.index:
+                print(f"\n   BEFORE: {df['review_text'][idx]}")
+                print(f"   AFTER:  {prepared['text'][idx] or '(skipped)'}")
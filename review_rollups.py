@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Incrementally maintained rollups of analyzed reviews.
+
+Keeps counts of category x priority x rating per (app, day, version, country,
+language) in a small SQLite database, so trend questions ("did the bug rate
+jump in version 8.9?") are answered from the rollup table instead of
+reloading and rescanning `_analyzed_ai.csv` files.
+
+Usage:
+    python review_rollups.py ingest outputs/com.spotify.music_reviews_analyzed_ai.csv
+    python review_rollups.py trend com.spotify.music --by version --category "Bug Report"
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+from collections import Counter
+
+import pandas as pd
+
+DEFAULT_DB_PATH = os.path.join("outputs", "rollups.db")
+UNKNOWN = "UNKNOWN"
+
+DIMENSIONS = ("day", "version", "country", "language")
+FACETS = ("category", "priority", "rating")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    app TEXT NOT NULL,
+    day TEXT NOT NULL,
+    version TEXT NOT NULL,
+    country TEXT NOT NULL,
+    language TEXT NOT NULL,
+    category TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    rating INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (app, day, version, country, language, category, priority, rating)
+) WITHOUT ROWID;
+
+-- One row per counted review, so re-analyzed reviews move between buckets
+-- instead of being counted twice.
+CREATE TABLE IF NOT EXISTS rollup_reviews (
+    review_key TEXT PRIMARY KEY,
+    app TEXT NOT NULL,
+    day TEXT NOT NULL,
+    version TEXT NOT NULL,
+    country TEXT NOT NULL,
+    language TEXT NOT NULL,
+    category TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    rating INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_rollups_app_version ON rollups (app, version);
+"""
+
+BUCKET_COLUMNS = ("app",) + DIMENSIONS + FACETS
+
+def app_name_from_path(file_path):
+    """
+    Derives the app name from a reviews CSV path (raw or analyzed).
+    """
+    name = os.path.basename(file_path)
+    for suffix in ("_analyzed_ai.csv", ".csv", "_reviews"):
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+    return name
+
+def connect(db_path=DEFAULT_DB_PATH):
+    """
+    Opens (and creates if needed) the rollup database.
+    """
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def review_keys(app, df, by_market=True):
+    """
+    One key per analyzed row: app, reviewId and the market it was fetched from.
+    The same review is returned for several country/language combinations and
+    counts once in each market's bucket (the same convention as review_search).
+    With by_market=False the market is left out, so the copies share one key.
+    """
+    n = len(df)
+
+    def market(name):
+        values = df[name] if name in df.columns else pd.Series([None] * n, index=df.index)
+        return values.fillna(UNKNOWN).astype(str).str.upper()
+
+    suffix = "|" + market('country') + "|" + market('language') if by_market else ""
+    if 'reviewId' in df.columns and df['reviewId'].notna().all():
+        return (app + "|" + df['reviewId'].astype(str) + suffix).tolist()
+
+    # Older CSVs have no reviewId: fall back to a hash of the review itself
+    dates = df['date'].astype(str) if 'date' in df.columns else pd.Series([""] * n, index=df.index)
+    hashes = [hashlib.sha1(f"{date}|{text}".encode("utf-8")).hexdigest()
+              for date, text in zip(dates, df['review_text'].astype(str))]
+    return (app + "|" + pd.Series(hashes, index=df.index) + suffix).tolist()
+
+def _bucket_frame(app, df):
+    """
+    Normalises analyzed rows into rollup bucket columns (vectorized).
+    """
+    n = len(df)
+
+    def column(name):
+        if name in df.columns:
+            return df[name]
+        return pd.Series([None] * n, index=df.index)
+
+    buckets = pd.DataFrame(index=df.index)
+    buckets['app'] = app
+    buckets['day'] = pd.to_datetime(column('date'), errors='coerce').dt.strftime('%Y-%m-%d').fillna(UNKNOWN)
+    buckets['version'] = column('version').fillna(UNKNOWN).astype(str)
+    buckets['country'] = column('country').fillna(UNKNOWN).astype(str).str.upper()
+    buckets['language'] = column('language').fillna(UNKNOWN).astype(str).str.upper()
+    buckets['category'] = column('category').fillna(UNKNOWN).astype(str)
+    buckets['priority'] = column('priority').fillna(UNKNOWN).astype(str)
+    buckets['rating'] = pd.to_numeric(column('rating'), errors='coerce').fillna(0).astype(int)
+    buckets['review_key'] = review_keys(app, df)
+    # Last classification wins if a review appears twice in the same batch
+    return buckets.drop_duplicates('review_key', keep='last')
+
+def add_reviews(conn, app, df):
+    """
+    Folds newly analyzed rows (with 'category' and 'priority') into the rollups.
+    Reviews seen before are moved to their new bucket rather than double counted.
+    Returns the number of reviews that were new to the rollups.
+    """
+    if df is None or df.empty:
+        return 0
+
+    buckets = _bucket_frame(app, df)
+    rows = list(buckets[list(BUCKET_COLUMNS) + ['review_key']].itertuples(index=False, name=None))
+    keys = [row[-1] for row in rows]
+
+    previous = {}
+    # Chunk to stay under SQLite's bound-parameter limit
+    for start in range(0, len(keys), 500):
+        chunk = keys[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        for row in conn.execute(
+            f"SELECT review_key, {', '.join(BUCKET_COLUMNS)} FROM rollup_reviews WHERE review_key IN ({placeholders})",
+            chunk,
+        ):
+            previous[row[0]] = tuple(row[1:])
+
+    deltas = Counter()
+    for row in rows:
+        bucket, key = row[:-1], row[-1]
+        old = previous.get(key)
+        if old == bucket:
+            continue
+        if old is not None:
+            deltas[old] -= 1
+        deltas[bucket] += 1
+
+    with conn:
+        conn.executemany(
+            f"""INSERT INTO rollups ({', '.join(BUCKET_COLUMNS)}, count) VALUES ({', '.join('?' * (len(BUCKET_COLUMNS) + 1))})
+                ON CONFLICT DO UPDATE SET count = count + excluded.count""",
+            [bucket + (delta,) for bucket, delta in deltas.items() if delta],
+        )
+        conn.execute("DELETE FROM rollups WHERE count <= 0")
+        conn.executemany(
+            f"INSERT OR REPLACE INTO rollup_reviews (review_key, {', '.join(BUCKET_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * (len(BUCKET_COLUMNS) + 1))})",
+            [(row[-1],) + row[:-1] for row in rows if previous.get(row[-1]) != row[:-1]],
+        )
+
+    return sum(1 for key in keys if key not in previous)
+
+def ingest_csv(file_path, db_path=DEFAULT_DB_PATH, app=None):
+    """
+    Loads an `_analyzed_ai.csv` into the rollups. Safe to re-run on the same file.
+    """
+    df = pd.read_csv(file_path)
+    if 'category' not in df.columns or 'priority' not in df.columns:
+        raise ValueError("❌ CSV must contain 'category' and 'priority' columns (run the AI analysis first).")
+
+    app = app or app_name_from_path(file_path)
+    conn = connect(db_path)
+    try:
+        return app, add_reviews(conn, app, df)
+    finally:
+        conn.close()
+
+def query_trend(conn, app, by="version", category=None, priority=None, rating=None,
+                since=None, until=None, country=None, language=None, version=None):
+    """
+    Returns [(group, total_reviews, matching_reviews, share, avg_rating)] for one app,
+    grouped by 'day', 'version', 'country' or 'language'. 'matching' counts the
+    reviews that satisfy the category/priority/rating filter within each group.
+    """
+    if by not in DIMENSIONS:
+        raise ValueError(f"❌ Cannot group by '{by}'. Choose one of: {', '.join(DIMENSIONS)}")
+
+    where = ["app = ?"]
+    params = [app]
+    for column, value in (("country", country), ("language", language), ("version", version)):
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value.upper() if column != "version" else value)
+    if since:
+        where.append("day >= ?")
+        params.append(since)
+    if until:
+        where.append("day <= ?")
+        params.append(until)
+
+    match = []
+    match_params = []
+    for column, value in (("category", category), ("priority", priority), ("rating", rating)):
+        if value is not None:
+            match.append(f"{column} = ?")
+            match_params.append(value)
+    match_expr = " AND ".join(match) if match else "1"
+
+    sql = f"""
+        SELECT {by},
+               SUM(count),
+               SUM(CASE WHEN {match_expr} THEN count ELSE 0 END),
+               SUM(CASE WHEN rating > 0 THEN rating * count ELSE 0 END) * 1.0
+                   / NULLIF(SUM(CASE WHEN rating > 0 THEN count ELSE 0 END), 0)
+        FROM rollups
+        WHERE {' AND '.join(where)}
+        GROUP BY {by}
+        ORDER BY {by}
+    """
+    results = []
+    for group, total, matching, avg_rating in conn.execute(sql, match_params + params):
+        results.append((group, total, matching, matching / total if total else 0.0, avg_rating))
+    return results
+
+def print_trend(rows, by, label):
+    print(f"{by.capitalize():<14} {'Reviews':>9} {label:>14} {'Share':>8} {'Avg ⭐':>7}")
+    print("-" * 56)
+    for group, total, matching, share, avg_rating in rows:
+        avg = f"{avg_rating:.2f}" if avg_rating is not None else "-"
+        print(f"{str(group):<14} {total:>9} {matching:>14} {share:>7.1%} {avg:>7}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain and query review rollups.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help=f"Rollup database (default {DEFAULT_DB_PATH})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = sub.add_parser("ingest", help="Add analyzed CSV files to the rollups")
+    ingest_parser.add_argument("files", nargs="+")
+    ingest_parser.add_argument("--app", default=None, help="Override the app name derived from the file name")
+
+    trend_parser = sub.add_parser("trend", help="Show a trend for one app")
+    trend_parser.add_argument("app")
+    trend_parser.add_argument("--by", default="version", choices=DIMENSIONS)
+    trend_parser.add_argument("--category", default=None, help="e.g. 'Bug Report'")
+    trend_parser.add_argument("--priority", default=None, help="High, Medium or Low")
+    trend_parser.add_argument("--rating", type=int, default=None)
+    trend_parser.add_argument("--since", default=None, help="YYYY-MM-DD")
+    trend_parser.add_argument("--until", default=None, help="YYYY-MM-DD")
+    trend_parser.add_argument("--country", default=None)
+    trend_parser.add_argument("--language", default=None)
+    trend_parser.add_argument("--version", default=None)
+
+    sub.add_parser("apps", help="List apps in the rollups")
+
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        for file_path in args.files:
+            try:
+                app, added = ingest_csv(file_path, args.db, args.app)
+                print(f"✅ {file_path}: {added} new reviews rolled up for {app}")
+            except Exception as e:
+                print(f"❌ {file_path}: {e}")
+    else:
+        if not os.path.exists(args.db):
+            print(f"❌ Rollup database '{args.db}' not found. Analyze or ingest reviews first.")
+            raise SystemExit(1)
+        conn = connect(args.db)
+        if args.command == "apps":
+            for app, total in conn.execute("SELECT app, SUM(count) FROM rollups GROUP BY app ORDER BY app"):
+                print(f"{app}: {total} reviews")
+        else:
+            start = time.perf_counter()
+            rows = query_trend(conn, args.app, args.by, args.category, args.priority, args.rating,
+                               args.since, args.until, args.country, args.language, args.version)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if not rows:
+                print(f"⚠️ No rolled-up reviews for '{args.app}'.")
+            else:
+                label = " / ".join(str(v) for v in (args.category, args.priority, args.rating) if v is not None) or "Matching"
+                print_trend(rows, args.by, label[:14])
+                print(f"\n({elapsed_ms:.1f} ms)")
+        conn.close()
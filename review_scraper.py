@@ -4,7 +4,13 @@ from google_play_scraper import Sort, reviews, search
 import time
 from datetime import datetime
 import os
+import hashlib
+from array import array
+import argparse
 import playstore_analysis  # Import the new analysis module
+import async_play_client
+import profiling
+import review_search
 
 # ==========================================
 # CONFIGURATION (DEFAULTS)
@@ -14,6 +20,16 @@ DEFAULT_COUNT = 1000
 DEFAULT_LANG = 'en'
 DEFAULT_COUNTRY = 'us'
 
+# Redundant-combination probing: many apps return the same reviews for several
+# country/language pairs. A first page is fetched per pair, pairs whose first
+# pages hold exactly the same review IDs are grouped, and the full fetch runs
+# once per group. Not used with USE_ASYNC_CLIENT (every pair is fetched concurrently).
+PROBE_COUNT = 100
+
+# Use the pooled async client (async_play_client.py) instead of google_play_scraper's
+# per-request connections. Requires httpx; falls back to google_play_scraper otherwise.
+USE_ASYNC_CLIENT = os.getenv("PLAY_ASYNC_CLIENT", "0") == "1" and async_play_client.httpx is not None
+
 # Valid ISO 3166-1 alpha-2 country codes (common markets)
 VALID_COUNTRY_CODES = {
     'us', 'gb', 'in', 'ca', 'au', 'de', 'fr', 'jp', 'kr', 'cn', 'br', 'mx', 
@@ -185,9 +201,13 @@ def search_apps(query, country, lang, n_hits=10):
     """
     Improved app search with better results and error handling.
     """
+    if USE_ASYNC_CLIENT:
+        return async_play_client.search_apps(query, country, lang, n_hits=n_hits)
+
     try:
         # Try searching with the query
-        results = search(query, lang=lang, country=country, n_hits=n_hits)
+        with profiling.span("scrape.search", query=query):
+            results = search(query, lang=lang, country=country, n_hits=n_hits)
         
         # Filter out results with missing appId
         valid_results = [r for r in results if r.get('appId')]
@@ -333,17 +353,21 @@ def fetch_reviews(app_id, count, country, lang):
     if not app_id:
         print("❌ Error: Invalid App ID (None). Cannot fetch reviews.")
         return []
+
+    if USE_ASYNC_CLIENT:
+        return async_play_client.fetch_reviews(app_id, count, country, lang)
         
     print(f"   Fetching from {country} ({lang})...", end=" ")
 
     try:
-        result, continuation_token = reviews(
-            app_id,
-            lang=lang,             
-            country=country.lower(),          
-            sort=Sort.NEWEST,      
-            count=count
-        )
+        with profiling.span("scrape.reviews", country=country, lang=lang):
+            result, continuation_token = reviews(
+                app_id,
+                lang=lang,             
+                country=country.lower(),          
+                sort=Sort.NEWEST,      
+                count=count
+            )
         
         # Add country and language information to each review
         for review in result:
@@ -356,6 +380,83 @@ def fetch_reviews(app_id, count, country, lang):
         print(f"❌ Failed: {e}")
         return []
 
+def review_fingerprints(review_list):
+    """
+    Sorted, de-duplicated 64-bit fingerprints of the review IDs, stored in an
+    array('Q') (8 bytes per review, unlike a set of Python ints).
+    """
+    return array('Q', sorted({
+        int.from_bytes(hashlib.blake2b(str(r.get('reviewId')).encode(), digest_size=8).digest(), 'big')
+        for r in review_list if r.get('reviewId')
+    }))
+
+def probe_combinations(app_id, count, countries, languages):
+    """
+    Fetches the first page for every country/language pair and groups pairs
+    that return exactly the same reviews. Partly overlapping pairs are fetched
+    separately, so no market is credited with another market's reviews.
+    Returns a list of groups: {'members': [(country, lang), ...], 'reviews': [...], 'token': ...}
+    """
+    probe_count = min(PROBE_COUNT, count)
+    groups = []
+    by_fingerprints = {}  # fingerprint bytes -> group
+
+    print(f"   🔬 Probing {len(countries) * len(languages)} combinations ({probe_count} reviews each)...")
+    for country in countries:
+        for lang in languages:
+            try:
+                with profiling.span("scrape.probe", country=country, lang=lang):
+                    result, token = reviews(app_id, lang=lang, country=country.lower(), sort=Sort.NEWEST, count=probe_count)
+            except Exception as e:
+                print(f"   {country} ({lang}): ❌ Probe failed: {e}")
+                continue
+
+            fingerprints = review_fingerprints(result).tobytes()
+            match = by_fingerprints.get(fingerprints) if fingerprints else None
+
+            if match:
+                match['members'].append((country, lang))
+            else:
+                group = {'members': [(country, lang)], 'reviews': result, 'token': token}
+                groups.append(group)
+                if fingerprints:
+                    by_fingerprints[fingerprints] = group
+            with profiling.span("scrape.rate_limit_sleep"):
+                time.sleep(0.5)  # Small delay between requests to avoid rate limiting
+
+    return groups
+
+def fetch_group_reviews(app_id, count, group):
+    """
+    Continues pagination for one equivalence group from its probe page and
+    attributes the reviews to every member country/language.
+    """
+    result = list(group['reviews'])
+    token = group['token']
+    remaining = count - len(result)
+
+    if remaining > 0 and token is not None and token.token is not None:
+        try:
+            # The continuation token carries the page size; ask only for what's missing
+            token.count = remaining
+            with profiling.span("scrape.reviews", group=len(group['members'])):
+                more, _ = reviews(app_id, continuation_token=token)
+            result.extend(more)
+        except Exception as e:
+            print(f"   ⚠️ Pagination failed after {len(result)} reviews: {e}")
+
+    all_reviews = []
+    for country, lang in group['members']:
+        for review in result:
+            attributed = dict(review)
+            attributed['country'] = country.upper()
+            attributed['language'] = lang.upper()
+            all_reviews.append(attributed)
+
+    members = ", ".join(f"{c} ({l})" for c, l in group['members'])
+    print(f"   Fetched {members}: ✅ {len(result)} reviews")
+    return all_reviews
+
 def fetch_reviews_multiple_countries_languages(app_id, count, countries, languages):
     """
     Fetches reviews from multiple countries and languages, combining all combinations.
@@ -371,12 +472,22 @@ def fetch_reviews_multiple_countries_languages(app_id, count, countries, languag
     print(f"   Languages: {', '.join(languages)} ({len(languages)} languages)")
     print(f"   Total combinations: {total_combinations}\n")
     
+    if USE_ASYNC_CLIENT:
+        # All combinations in flight at once over one pooled connection. No probing:
+        # concurrent fetches gain little from it, so every pair is fetched in full
+        with profiling.span("scrape.async_reviews", combinations=total_combinations):
+            all_reviews = async_play_client.fetch_reviews_multiple_countries_languages(app_id, count, countries, languages)
+        print(f"\n✅ Total reviews fetched: {len(all_reviews)} from {total_combinations} country/language combinations")
+        return all_reviews
+
     all_reviews = []
     
-    for country in countries:
-        for lang in languages:
-            country_reviews = fetch_reviews(app_id, count, country, lang)
-            all_reviews.extend(country_reviews)
+    groups = probe_combinations(app_id, count, countries, languages)
+    print(f"   {len(groups)} distinct review sets across {total_combinations} combinations\n")
+
+    for group in groups:
+        all_reviews.extend(fetch_group_reviews(app_id, count, group))
+        with profiling.span("scrape.rate_limit_sleep"):
             time.sleep(0.5)  # Small delay between requests to avoid rate limiting
     
     print(f"\n✅ Total reviews fetched: {len(all_reviews)} from {total_combinations} country/language combinations")
@@ -428,6 +539,12 @@ def process_data(raw_data, min_date=None):
 # MAIN EXECUTION
 # ==========================================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Google Play Store review scraper and analysis toolkit.")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    if args.profile:
+        profiling.start("review_scraper", args.profile, args.profile_dir)
+
     print("========================================")
     print("   GOOGLE PLAY STORE TOOLKIT")
     print("========================================")
@@ -450,7 +567,8 @@ if __name__ == "__main__":
             # Multiple countries and/or languages
             raw_reviews = fetch_reviews_multiple_countries_languages(app_id, count, countries, languages)
         
-        df_reviews = process_data(raw_reviews, min_date)
+        with profiling.span("pandas.process_data", rows=len(raw_reviews)):
+            df_reviews = process_data(raw_reviews, min_date)
 
         if df_reviews is not None and not df_reviews.empty:
             output_dir = "outputs"
@@ -464,9 +582,20 @@ if __name__ == "__main__":
                 languages_str = "_".join(languages).lower()
                 filename = os.path.join(output_dir, f"{app_id}_{countries_str}_{languages_str}_reviews.csv")
             
-            df_reviews.to_csv(filename, index=False)
+            with profiling.span("csv.write", rows=len(df_reviews)):
+                df_reviews.to_csv(filename, index=False)
             
             print(f"\n💾 Data saved to: {filename}")
+
+            # Make the new reviews searchable right away (see review_search.py)
+            try:
+                with profiling.span("sinks.search_index", rows=len(df_reviews)):
+                    search_conn = review_search.connect(os.path.join(output_dir, "reviews_search.db"))
+                    indexed = review_search.add_reviews(search_conn, app_id, df_reviews)
+                    search_conn.close()
+                print(f"🔍 Indexed {indexed} reviews for search")
+            except Exception as e:
+                print(f"⚠️ Search indexing failed: {e}")
             print("-" * 30)
             print(f"Total Reviews: {len(df_reviews)}")
             if 'country' in df_reviews.columns:
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Full-text search over stored reviews and their classifications.
+
+Reviews are indexed in SQLite FTS5 (outputs/reviews_search.db) as they are
+scraped and re-indexed with their category/priority as analysis lands, so
+investigating a roadmap item is a ranked query instead of grepping CSVs.
+
+Usage:
+    python review_search.py query '"offline mode"' --app com.spotify.music --category "Feature Request"
+    python review_search.py query 'crash*' --version 8.9.1 --priority High
+    python review_search.py index outputs/*.csv
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+import review_rollups  # shared app-name convention
+
+DEFAULT_DB_PATH = os.path.join("outputs", "reviews_search.db")
+DEFAULT_LIMIT = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY,
+    review_key TEXT NOT NULL UNIQUE,
+    app TEXT NOT NULL,
+    country TEXT,
+    language TEXT,
+    version TEXT,
+    rating INTEGER,
+    date TEXT,
+    category TEXT,
+    priority TEXT,
+    review_text TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_reviews_app_category ON reviews (app, category, priority);
+CREATE INDEX IF NOT EXISTS idx_reviews_app_version ON reviews (app, version);
+
+-- External-content FTS table: the text is stored once, in 'reviews'
+CREATE VIRTUAL TABLE IF NOT EXISTS reviews_fts USING fts5(
+    review_text,
+    content='reviews',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS reviews_ai AFTER INSERT ON reviews BEGIN
+    INSERT INTO reviews_fts (rowid, review_text) VALUES (new.id, new.review_text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS reviews_ad AFTER DELETE ON reviews BEGIN
+    INSERT INTO reviews_fts (reviews_fts, rowid, review_text) VALUES ('delete', old.id, old.review_text);
+END;
+
+-- Only re-tokenize when the text itself changes (not on category/priority updates)
+CREATE TRIGGER IF NOT EXISTS reviews_au AFTER UPDATE OF review_text ON reviews BEGIN
+    INSERT INTO reviews_fts (reviews_fts, rowid, review_text) VALUES ('delete', old.id, old.review_text);
+    INSERT INTO reviews_fts (rowid, review_text) VALUES (new.id, new.review_text);
+END;
+"""
+
+FILTERS = ("app", "country", "language", "version", "rating", "category", "priority")
+
+def connect(db_path=DEFAULT_DB_PATH):
+    """
+    Opens (and creates if needed) the search index.
+    """
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def _values(df, name):
+    """
+    Column values as a list with missing values as None (for SQLite).
+    """
+    if name not in df.columns:
+        return [None] * len(df)
+    return [None if pd.isna(v) else v for v in df[name]]
+
+def _index_rows(app, df):
+    """
+    Converts review rows into index tuples. A review is identified by its
+    reviewId plus the market it was fetched from (the same review can be
+    returned for several country/language combinations). The app name is not
+    part of the key, so analyzed files named after several markets still
+    update the rows indexed by the scraper.
+    """
+    rows = []
+    for review_id, country, language, version, rating, date, category, priority, text in zip(
+        *(_values(df, c) for c in ('reviewId', 'country', 'language', 'version', 'rating',
+                                   'date', 'category', 'priority', 'review_text'))
+    ):
+        if not text:
+            continue
+        text = str(text)
+        date = None if date is None else str(date)
+        country = str(country or "UNKNOWN").upper()
+        language = str(language or "UNKNOWN").upper()
+        if review_id is None:
+            review_id = hashlib.sha1(f"{app}|{date}|{text}".encode("utf-8")).hexdigest()
+        rows.append((
+            f"{review_id}|{country}|{language}", app, country, language,
+            None if version is None else str(version),
+            None if rating is None else int(rating),
+            date, category, priority, text,
+        ))
+    return rows
+
+def add_reviews(conn, app, df):
+    """
+    Indexes scraped or analyzed rows. Existing reviews keep their text and get
+    their category/priority filled in when the new rows carry a classification.
+    Returns the number of rows written.
+    """
+    if df is None or df.empty:
+        return 0
+
+    rows = _index_rows(app, df)
+    with conn:
+        conn.executemany(
+            """INSERT INTO reviews (review_key, app, country, language, version, rating, date, category, priority, review_text)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (review_key) DO UPDATE SET
+                   category = COALESCE(excluded.category, category),
+                   priority = COALESCE(excluded.priority, priority)""",
+            rows,
+        )
+    return len(rows)
+
+def index_csv(file_path, db_path=DEFAULT_DB_PATH, app=None):
+    """
+    Indexes a raw `_reviews.csv` or an `_analyzed_ai.csv`. Safe to re-run.
+    """
+    df = pd.read_csv(file_path, dtype={'version': str})
+    if 'review_text' not in df.columns:
+        raise ValueError("❌ CSV must contain a 'review_text' column.")
+
+    app = app or review_rollups.app_name_from_path(file_path)
+    conn = connect(db_path)
+    try:
+        return app, add_reviews(conn, app, df)
+    finally:
+        conn.close()
+
+def search(conn, query, limit=DEFAULT_LIMIT, min_rating=None, max_rating=None, **filters):
+    """
+    Runs an FTS5 query (phrases in double quotes, prefixes with '*', AND/OR/NOT)
+    and returns ranked result dicts with a highlighted snippet.
+    Keyword filters: app, country, language, version, rating, category, priority.
+    """
+    where = ["reviews_fts MATCH ?"]
+    params = [query]
+    for name in FILTERS:
+        value = filters.get(name)
+        if value is None:
+            continue
+        if name in ("country", "language"):
+            value = value.upper()
+        where.append(f"r.{name} = ?")
+        params.append(value)
+    if min_rating is not None:
+        where.append("r.rating >= ?")
+        params.append(min_rating)
+    if max_rating is not None:
+        where.append("r.rating <= ?")
+        params.append(max_rating)
+
+    sql = f"""
+        SELECT r.app, r.country, r.language, r.version, r.rating, r.date, r.category, r.priority,
+               snippet(reviews_fts, 0, '[', ']', '…', 16), bm25(reviews_fts)
+        FROM reviews_fts
+        JOIN reviews AS r ON r.id = reviews_fts.rowid
+        WHERE {' AND '.join(where)}
+        ORDER BY bm25(reviews_fts)
+        LIMIT ?
+    """
+    columns = ("app", "country", "language", "version", "rating", "date", "category", "priority", "snippet", "score")
+    return [dict(zip(columns, row)) for row in conn.execute(sql, params + [limit])]
+
+def print_results(results):
+    for i, r in enumerate(results, 1):
+        rating = f"{r['rating']}⭐" if r['rating'] is not None else "-"
+        labels = " | ".join(v for v in (r['category'], r['priority']) if v) or "not analyzed"
+        print(f"\n{i}. [{r['app']}] v{r['version'] or '?'} {r['country']}/{r['language']} {rating} ({labels})")
+        print(f"   {str(r['date'])[:10]}  {r['snippet']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Full-text search over scraped and analyzed reviews.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help=f"Search index (default {DEFAULT_DB_PATH})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = sub.add_parser("index", help="Index review CSV files (raw or analyzed)")
+    index_parser.add_argument("files", nargs="+")
+    index_parser.add_argument("--app", default=None, help="Override the app name derived from the file name")
+
+    query_parser = sub.add_parser("query", help="Search the index")
+    query_parser.add_argument("query", help="FTS5 query, e.g. '\"dark mode\"' or 'crash*'")
+    for name in ("app", "country", "language", "version", "category", "priority"):
+        query_parser.add_argument(f"--{name}", default=None)
+    query_parser.add_argument("--rating", type=int, default=None)
+    query_parser.add_argument("--min-rating", type=int, default=None)
+    query_parser.add_argument("--max-rating", type=int, default=None)
+    query_parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+
+    sub.add_parser("optimize", help="Merge FTS segments after large imports")
+
+    args = parser.parse_args()
+
+    if args.command == "index":
+        for file_path in args.files:
+            try:
+                app, written = index_csv(file_path, args.db, args.app)
+                print(f"✅ {file_path}: indexed {written} reviews for {app}")
+            except Exception as e:
+                print(f"❌ {file_path}: {e}")
+    else:
+        if not os.path.exists(args.db):
+            print(f"❌ Search index '{args.db}' not found. Fetch or index reviews first.")
+            raise SystemExit(1)
+        conn = connect(args.db)
+        if args.command == "optimize":
+            with conn:
+                conn.execute("INSERT INTO reviews_fts (reviews_fts) VALUES ('optimize')")
+            print("✅ Search index optimized.")
+        else:
+            filters = {name: getattr(args, name) for name in FILTERS}
+            start = time.perf_counter()
+            try:
+                results = search(conn, args.query, args.limit, args.min_rating, args.max_rating, **filters)
+            except sqlite3.OperationalError as e:
+                print(f"❌ Invalid query: {e}")
+                raise SystemExit(1)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if results:
+                print_results(results)
+            else:
+                print("⚠️ No matching reviews.")
+            print(f"\n({len(results)} results in {elapsed_ms:.1f} ms)")
+        conn.close()
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Sharded AI analysis over a local shared work queue.
+
+A raw reviews CSV is split into row-range tasks stored in an SQLite queue next
+to it ({csv}.queue.db). Any number of worker processes - on this machine or on
+others sharing the filesystem, each with its own API key or model - lease
+tasks, classify them and commit the results. Leases are kept alive by a
+heartbeat; a task whose worker dies is handed out again once its lease expires.
+The coordinator merges the results into the usual `_analyzed_ai.csv`.
+
+Usage:
+    python work_queue.py run outputs/com.spotify.music_reviews.csv --workers 4 \\
+        --api-key-envs GEMINI_API_KEY,GEMINI_API_KEY_2
+
+    # Or drive the pieces separately (e.g. workers on several machines):
+    python work_queue.py init outputs/com.spotify.music_reviews.csv
+    python work_queue.py worker outputs/com.spotify.music_reviews.csv --api-key-env GEMINI_API_KEY_2
+    python work_queue.py status outputs/com.spotify.music_reviews.csv
+    python work_queue.py merge outputs/com.spotify.music_reviews.csv --roadmap
+
+Note: SQLite relies on file locking; use a shared filesystem with working
+POSIX locks (most local and NFSv4 setups) when workers run on several machines.
+The queue uses a rollback journal rather than WAL, whose shared-memory index
+does not work across hosts.
+"""
+import argparse
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+import pandas as pd
+
+import playstore_analysis
+import profiling
+
+TASK_SIZE = 100              # Rows per task (a few LLM batches)
+LEASE_SECONDS = 120          # A task is re-issued if its worker stops heartbeating for this long
+HEARTBEAT_SECONDS = 30
+MAX_ATTEMPTS = 3             # Tasks failing this often are marked 'failed'
+MAX_WORKER_FAILURES = 2      # A worker stops after this many failed tasks in a row (bad key, no quota)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    start_row INTEGER NOT NULL,
+    end_row INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',   -- pending | leased | done | failed
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, id);
+
+CREATE TABLE IF NOT EXISTS results (
+    row INTEGER PRIMARY KEY,
+    category TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    worker TEXT NOT NULL
+);
+"""
+
+def queue_path(file_path):
+    return file_path + ".queue.db"
+
+def connect(db_path):
+    # Long busy timeout: many workers contend for the write lock while claiming
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    # Rollback journal: WAL needs shared memory, which is unsafe on network filesystems
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.executescript(SCHEMA)
+    return conn
+
+def init_queue(file_path, task_size=TASK_SIZE, reset=False):
+    """
+    Creates the task queue for a raw reviews CSV. An existing queue is kept
+    (so interrupted runs resume) unless reset is True.
+    """
+    db_path = queue_path(file_path)
+    if reset and os.path.exists(db_path):
+        for suffix in ("", "-journal", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    conn = connect(db_path)
+    try:
+        if conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]:
+            print(f"♻️  Resuming existing queue: {db_path}")
+            return db_path
+
+        total = len(pd.read_csv(file_path, usecols=['review_text']))
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+            ("file_path", os.path.abspath(file_path)),
+            ("total_rows", str(total)),
+        ])
+        conn.executemany(
+            "INSERT INTO tasks (start_row, end_row) VALUES (?, ?)",
+            [(start, min(start + task_size, total)) for start in range(0, total, task_size)],
+        )
+        conn.execute("COMMIT")
+        print(f"📋 Queue created: {db_path} ({total} reviews in {-(-total // task_size)} tasks)")
+        return db_path
+    finally:
+        conn.close()
+
+def claim_task(conn, worker_id, released=()):
+    """
+    Atomically leases the next pending (or expired) task. Returns (id, start, end) or None.
+    Tasks in `released` (ones this worker gave back) are only claimed when
+    nothing else is left, so other workers get the first retry.
+    An expired task that has already used MAX_ATTEMPTS leases (e.g. it keeps
+    killing its worker) is marked failed instead of being handed out again.
+    """
+    now = time.time()
+    released = list(released)
+    placeholders = ", ".join("?" * len(released))
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            """UPDATE tasks SET status = 'failed', worker = NULL, lease_expires = NULL,
+                                error = COALESCE(error, 'lease expired ' || attempts || ' times (worker died?)')
+               WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?""",
+            (now, MAX_ATTEMPTS),
+        )
+        row = conn.execute(
+            f"""SELECT id, start_row, end_row FROM tasks
+                WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?)
+                ORDER BY id IN ({placeholders}), id LIMIT 1""",
+            (now, *released),
+        ).fetchone()
+        if row:
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                (worker_id, now + LEASE_SECONDS, row[0]),
+            )
+        conn.execute("COMMIT")
+        return row
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def complete_task(conn, task_id, worker_id, start_row, results):
+    """
+    Stores a task's results and marks it done, but only if this worker still
+    holds the lease. Returns False if the lease was lost (results discarded).
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        owned = conn.execute(
+            "UPDATE tasks SET status = 'done', lease_expires = NULL, error = NULL "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (task_id, worker_id),
+        ).rowcount
+        if owned:
+            conn.executemany(
+                "INSERT OR REPLACE INTO results (row, category, priority, worker) VALUES (?, ?, ?, ?)",
+                [(start_row + i, cat, prio, worker_id) for i, (cat, prio) in enumerate(results)],
+            )
+        conn.execute("COMMIT")
+        return bool(owned)
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def release_task(conn, task_id, worker_id, error, count_attempt=True):
+    """
+    Returns a task to the queue after a failure (or marks it failed after MAX_ATTEMPTS).
+    With count_attempt=False (the worker's key or quota failed, not the task)
+    the lease is not counted against the task's attempts.
+    """
+    uncount = 0 if count_attempt else 1
+    conn.execute(
+        """UPDATE tasks SET status = CASE WHEN attempts - ? >= ? THEN 'failed' ELSE 'pending' END,
+                            attempts = attempts - ?, worker = NULL, lease_expires = NULL, error = ?
+           WHERE id = ? AND worker = ?""",
+        (uncount, MAX_ATTEMPTS, uncount, str(error)[:500], task_id, worker_id),
+    )
+
+class Heartbeat:
+    """
+    Background thread that keeps extending the lease of the task being worked on.
+    """
+
+    def __init__(self, db_path, worker_id):
+        self.db_path = db_path
+        self.worker_id = worker_id
+        self.task_id = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        conn = connect(self.db_path)
+        try:
+            while not self._stop.wait(HEARTBEAT_SECONDS):
+                if self.task_id is not None:
+                    conn.execute(
+                        "UPDATE tasks SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                        (time.time() + LEASE_SECONDS, self.task_id, self.worker_id),
+                    )
+        finally:
+            conn.close()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+def run_worker(file_path, worker_id=None, api_key_env=None, model=None):
+    """
+    Claims and classifies tasks until the queue is drained.
+    """
+    db_path = queue_path(file_path)
+    if not os.path.exists(db_path):
+        print(f"❌ No queue found for {file_path}. Run 'init' first.")
+        return 0
+
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    if api_key_env:
+        api_key = os.getenv(api_key_env)
+        if not api_key:
+            print(f"❌ [{worker_id}] Environment variable {api_key_env} is not set.")
+            return 0
+        os.environ["GEMINI_API_KEY"] = api_key
+    if model:
+        playstore_analysis.MODEL_NAME = model
+
+    try:
+        model_name = playstore_analysis.configure_llm()
+    except Exception as e:
+        print(f"❌ [{worker_id}] Failed to configure LLM: {e}")
+        return 0
+
+    df = pd.read_csv(file_path)
+    prepared = playstore_analysis.prepare_prompt_texts(df['review_text'])
+    prompt_texts = prepared['text'].tolist()
+    skip = prepared['skip'].tolist()
+    app_context = os.path.basename(file_path).replace("_reviews.csv", "")
+    hedger = playstore_analysis.BatchHedger() if playstore_analysis.HEDGE_REQUESTS else None
+
+    conn = connect(db_path)
+    heartbeat = Heartbeat(db_path, worker_id).start()
+    processed = 0
+    failures = 0
+    released = set()
+    try:
+        while failures < MAX_WORKER_FAILURES:
+            with profiling.span("queue.claim"):
+                task = claim_task(conn, worker_id, released)
+            if task is None:
+                break
+            task_id, start_row, end_row = task
+            heartbeat.task_id = task_id
+
+            try:
+                results = []
+                for i, end in playstore_analysis.plan_batches(skip, playstore_analysis.BATCH_SIZE, start_row, end_row):
+                    with profiling.span("analysis.batch", start_row=i):
+                        # strict: retryable API errors (quota, bad key, outages) release the
+                        # task for another worker; other errors default the batch
+                        results.extend(playstore_analysis.classify_batch(
+                            model_name, prompt_texts[i:end], skip[i:end], app_context, hedger, strict=True))
+                    if not all(skip[i:end]):
+                        with profiling.span("analysis.rate_limit_sleep"):
+                            time.sleep(1.0)  # Same per-key rate limiting as analyze_dataset
+            except Exception as e:
+                release_task(conn, task_id, worker_id, e,
+                             count_attempt=not playstore_analysis.is_key_error(e))
+                released.add(task_id)
+                print(f"⚠️ [{worker_id}] Task {task_id} failed: {e}")
+                failures += 1
+                if failures == MAX_WORKER_FAILURES:
+                    print(f"❌ [{worker_id}] Stopping after {failures} failed tasks in a row; "
+                          f"other workers will pick up the remaining tasks.")
+                continue
+            finally:
+                heartbeat.task_id = None
+
+            with profiling.span("queue.complete", task=task_id):
+                completed = complete_task(conn, task_id, worker_id, start_row, results)
+            if completed:
+                failures = 0
+                processed += len(results)
+                print(f"   [{worker_id}] Task {task_id} done (rows {start_row}-{end_row - 1})")
+            else:
+                print(f"⚠️ [{worker_id}] Lost lease on task {task_id}; results discarded.")
+    except KeyboardInterrupt:
+        print(f"\n⚠️ [{worker_id}] Interrupted; the current task will be re-issued after its lease expires.")
+    finally:
+        heartbeat.stop()
+        if hedger:
+            hedger.shutdown()
+        conn.close()
+
+    print(f"✅ [{worker_id}] Finished: {processed} reviews classified.")
+    return processed
+
+def queue_status(file_path):
+    """
+    Returns ({status: task_count}, classified_rows, total_rows).
+    """
+    conn = connect(queue_path(file_path))
+    try:
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+        classified = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        total = conn.execute("SELECT value FROM meta WHERE key = 'total_rows'").fetchone()
+        return counts, classified, int(total[0]) if total else 0
+    finally:
+        conn.close()
+
+def merge_results(file_path, partial=False, roadmap=False):
+    """
+    Joins the queue's results onto the raw CSV and writes `_analyzed_ai.csv`.
+    Rows are fed to the same sinks (rollups, search index, ...) as analyze_dataset.
+    """
+    counts, classified, total = queue_status(file_path)
+    if classified < total and not partial:
+        print(f"❌ Only {classified}/{total} reviews classified ({counts}). Wait for workers or use --partial.")
+        return None
+
+    df = pd.read_csv(file_path)
+    conn = connect(queue_path(file_path))
+    try:
+        results = pd.read_sql_query("SELECT row, category, priority FROM results ORDER BY row", conn)
+    finally:
+        conn.close()
+
+    df_analyzed = df.join(results.set_index('row'), how='inner')
+    app_context = os.path.basename(file_path).replace("_reviews.csv", "")
+    output_dir = os.path.dirname(file_path)
+
+    sinks = playstore_analysis.AnalysisSinks(output_dir, app_context)
+    try:
+        for start in range(0, len(df_analyzed), TASK_SIZE):
+            rows = df_analyzed.iloc[start : start + TASK_SIZE]
+            sinks.feed(rows.drop(columns=['category', 'priority']),
+                       list(zip(rows['category'], rows['priority'])))
+    finally:
+        sinks.close()
+
+    output_path = file_path.replace(".csv", "_analyzed_ai.csv")
+    df_analyzed.to_csv(output_path, index=False)
+
+    print(f"\n💾 Analysis saved to: {output_path}")
+    print(f"   - Reviews Analyzed: {len(df_analyzed)}")
+    print(f"   - Bugs Identified: {len(df_analyzed[df_analyzed['category'] == 'Bug Report'])}")
+    print(f"   - Feature Requests: {len(df_analyzed[df_analyzed['category'] == 'Feature Request'])}")
+
+    if roadmap:
+        try:
+            model_name = playstore_analysis.configure_llm()
+            playstore_analysis.generate_roadmap(model_name, df_analyzed, app_context, output_dir, sinks.top_issues())
+        except Exception as e:
+            print(f"❌ Roadmap generation failed: {e}")
+    return output_path
+
+def run_local(file_path, workers, api_key_envs=None, models=None, roadmap=False, profile=None,
+              profile_dir=profiling.DEFAULT_PROFILE_DIR):
+    """
+    Coordinator: creates the queue, starts worker processes (round-robin over
+    API keys and models) and merges the results when they finish.
+    With `profile` (a --profile mode) every worker writes its own profile.
+    """
+    init_queue(file_path)
+    api_key_envs = api_key_envs or [None]
+    models = models or [None]
+
+    processes = []
+    for n in range(workers):
+        cmd = [sys.executable, os.path.abspath(__file__), "worker", file_path,
+               "--worker-id", f"{socket.gethostname()}-w{n}"]
+        if profile:
+            cmd += ["--profile", profile, "--profile-dir", profile_dir]
+        if api_key_envs[n % len(api_key_envs)]:
+            cmd += ["--api-key-env", api_key_envs[n % len(api_key_envs)]]
+        if models[n % len(models)]:
+            cmd += ["--model", models[n % len(models)]]
+        processes.append(subprocess.Popen(cmd))
+    print(f"🚀 Started {workers} workers")
+
+    try:
+        for process in processes:
+            process.wait()
+    except KeyboardInterrupt:
+        print("\n⚠️ Stopping workers...")
+        for process in processes:
+            process.wait()
+
+    counts, classified, total = queue_status(file_path)
+    print(f"\n📊 Queue: {classified}/{total} reviews classified {counts}")
+    if classified < total:
+        print(f"⚠️ {total - classified} reviews were not classified; merging a partial analysis.")
+    return merge_results(file_path, partial=classified < total, roadmap=roadmap)
+
+def _split(value):
+    return [v.strip() for v in value.split(",") if v.strip()] if value else None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded AI analysis over a shared SQLite work queue.")
+    common = argparse.ArgumentParser(add_help=False)
+    profiling.add_arguments(common)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    init_parser = sub.add_parser("init", parents=[common], help="Create the task queue for a raw reviews CSV")
+    init_parser.add_argument("file")
+    init_parser.add_argument("--task-size", type=int, default=TASK_SIZE)
+    init_parser.add_argument("--reset", action="store_true", help="Discard an existing queue and its results")
+
+    worker_parser = sub.add_parser("worker", parents=[common], help="Claim and classify tasks until the queue is drained")
+    worker_parser.add_argument("file")
+    worker_parser.add_argument("--worker-id", default=None)
+    worker_parser.add_argument("--api-key-env", default=None, help="Environment variable holding this worker's API key")
+    worker_parser.add_argument("--model", default=None, help=f"Model name (default {playstore_analysis.MODEL_NAME})")
+
+    status_parser = sub.add_parser("status", parents=[common], help="Show queue progress")
+    status_parser.add_argument("file")
+
+    merge_parser = sub.add_parser("merge", parents=[common], help="Write the merged _analyzed_ai.csv")
+    merge_parser.add_argument("file")
+    merge_parser.add_argument("--partial", action="store_true", help="Merge even if some tasks are unfinished")
+    merge_parser.add_argument("--roadmap", action="store_true", help="Generate the roadmap after merging")
+
+    run_parser = sub.add_parser("run", parents=[common], help="Init, start local workers and merge")
+    run_parser.add_argument("file")
+    run_parser.add_argument("--workers", type=int, default=4)
+    run_parser.add_argument("--api-key-envs", default=None, help="Comma-separated env vars, assigned round-robin")
+    run_parser.add_argument("--models", default=None, help="Comma-separated model names, assigned round-robin")
+    run_parser.add_argument("--roadmap", action="store_true")
+
+    args = parser.parse_args()
+    if args.profile:
+        # One file per process: several workers may finish within the same second
+        profiling.start(f"work_queue_{args.command}_{os.getpid()}", args.profile, args.profile_dir)
+
+    if args.command == "init":
+        init_queue(args.file, args.task_size, args.reset)
+    elif args.command == "worker":
+        run_worker(args.file, args.worker_id, args.api_key_env, args.model)
+    elif args.command == "status":
+        if not os.path.exists(queue_path(args.file)):
+            print(f"❌ No queue found for {args.file}.")
+        else:
+            counts, classified, total = queue_status(args.file)
+            print(f"📊 {classified}/{total} reviews classified")
+            for status in ("pending", "leased", "done", "failed"):
+                print(f"   {status}: {counts.get(status, 0)} tasks")
+    elif args.command == "merge":
+        merge_results(args.file, args.partial, args.roadmap)
+    else:
+        run_local(args.file, args.workers, _split(args.api_key_envs), _split(args.models), args.roadmap,
+                  args.profile, args.profile_dir)